@@ -66,7 +66,7 @@
 #     return current_user
 
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, Optional, Tuple
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
@@ -77,6 +77,9 @@ from sqlalchemy import select
 from config import settings
 from database import get_db
 from models.user import User
+from models.store import Store
+from services.principal_cache import Principal, principal_cache
+from services.password_hashing import password_hasher
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
@@ -89,6 +92,14 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+# Request handlers use these: bcrypt takes 100ms+ and must not block the event loop
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.run(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password: str) -> str:
+    return await password_hasher.run(get_password_hash, password)
+
 # ---------------- JWT utils ----------------
 
 def create_access_token(
@@ -112,18 +123,29 @@ def create_access_token(
     )
     return encoded_jwt
 
+def access_token_claims(user: User) -> dict:
+    """Token payload: subject plus the principal claims trusted in AUTH_TRUSTED_CLAIMS mode"""
+    return {
+        "sub": str(user.id),  # JWT standard: sub is a string
+        "email": user.email,
+        "name": user.full_name,
+        "role": user.role,
+        "active": user.is_active,
+    }
+
 # ---------------- Auth dependencies ----------------
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: AsyncSession = Depends(get_db)
-) -> User:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+def _authenticate(
+    credentials: HTTPAuthorizationCredentials
+) -> Tuple[int, Optional[Principal]]:
+    """Decode the token: (user id, principal if known without a query)"""
     try:
         token = credentials.credentials
         payload = jwt.decode(
@@ -135,31 +157,119 @@ async def get_current_user(
         # JWT standard: sub is always string
         user_id = payload.get("sub")
         if user_id is None:
-            raise credentials_exception
+            raise _credentials_exception()
 
         user_id = int(user_id)  # IMPORTANT
     except (JWTError, ValueError):
-        raise credentials_exception
+        raise _credentials_exception()
 
-    result = await db.execute(
-        select(User).where(User.id == user_id)
-    )
-    user = result.scalar_one_or_none()
-
-    if user is None:
-        raise credentials_exception
+    if settings.AUTH_TRUSTED_CLAIMS and "role" in payload:
+        return user_id, Principal(
+            id=user_id,
+            email=payload.get("email"),
+            full_name=payload.get("name"),
+            role=payload["role"],
+            is_active=payload.get("active", True),
+        )
+    return user_id, principal_cache.get(user_id)
 
-    if not user.is_active:
+def _check_active(principal: Principal) -> None:
+    if not principal.is_active:
         raise HTTPException(
             status_code=400,
             detail="Inactive user"
         )
 
-    return user
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> Principal:
+    """The authenticated principal, without a users query on the hot path.
+    
+    Served from the token claims in AUTH_TRUSTED_CLAIMS mode, otherwise from
+    the principal cache, falling back to the database.
+    """
+    user_id, principal = _authenticate(credentials)
+
+    if principal is None:
+        result = await db.execute(
+            select(User).where(User.id == user_id)
+        )
+        user = result.scalar_one_or_none()
+
+        if user is None:
+            raise _credentials_exception()
+
+        principal = Principal.from_user(user)
+        principal_cache.put(principal)
+
+    _check_active(principal)
+    return principal
+
+def owned_store(*options) -> Callable:
+    """Dependency factory: the {store_id} store of the path, authorized for the caller.
+    
+    Authentication and the store load share one query (a user x store join
+    when the principal is not cached). `options` are loader options such as
+    selectinload(...) for the relationships the endpoint reads. Define the
+    dependency once at module level so FastAPI caches it per request.
+    """
+    async def dependency(
+        store_id: int,
+        credentials: HTTPAuthorizationCredentials = Depends(security),
+        db: AsyncSession = Depends(get_db)
+    ) -> Store:
+        user_id, principal = _authenticate(credentials)
+
+        if principal is None:
+            result = await db.execute(
+                select(User, Store)
+                .select_from(User)
+                .outerjoin(Store, Store.id == store_id)
+                .where(User.id == user_id)
+                .options(*options)
+            )
+            row = result.first()
+            if row is None:
+                raise _credentials_exception()
+
+            principal = Principal.from_user(row.User)
+            principal_cache.put(principal)
+            store = row.Store
+        else:
+            result = await db.execute(
+                select(Store).where(Store.id == store_id).options(*options)
+            )
+            store = result.scalar_one_or_none()
+
+        _check_active(principal)
+        if not store:
+            raise HTTPException(status_code=404, detail="Store not found")
+        if store.user_id != principal.id:
+            raise HTTPException(status_code=403, detail="Not your store")
+        return store
+
+    return dependency
+
+get_owned_store = owned_store()
+
+async def find_owned_store(
+    db: AsyncSession,
+    user_id: int,
+    store_id: int,
+    *options
+) -> Optional[Store]:
+    """The caller's store by id in one query, None if missing or not theirs"""
+    result = await db.execute(
+        select(Store)
+        .where(Store.id == store_id, Store.user_id == user_id)
+        .options(*options)
+    )
+    return result.scalar_one_or_none()
 
 async def get_current_admin(
-    current_user: User = Depends(get_current_user)
-) -> User:
+    current_user: Principal = Depends(get_current_user)
+) -> Principal:
     if current_user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
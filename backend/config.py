@@ -1,6 +1,7 @@
 import os
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 class Settings(BaseSettings):
     # App
@@ -16,9 +17,40 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Authenticated principal
+    PRINCIPAL_CACHE_MAX_ENTRIES: int = 10_000  # 0 disables the cache
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30  # max staleness of role/deactivation changes from other workers
+    # Trust role/is_active claims in the token instead of looking the user up.
+    # Role or activation changes then only apply once the user's token expires.
+    AUTH_TRUSTED_CLAIMS: bool = False
+    
+    # Password hashing (bcrypt, off the event loop)
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_QUEUE_DEPTH: int = 32  # waiting hashes before login/register return 503
+    
+    # Orders
+    ORDER_WORKER_ID: Optional[int] = None  # 0-1023, unique per process; leased from the database if unset
+    ORDER_WORKER_LEASE_SECONDS: float = 60  # a crashed process's worker id is reusable after this
+    
     # AI
     CHROMA_PERSIST_DIR: str = "./chroma_db"
     
+    # Catalog cache
+    CATALOG_CACHE_ENABLED: bool = True
+    CATALOG_CACHE_TTL_SECONDS: float = 30  # max staleness of writes made by other workers
+    CATALOG_CACHE_MAX_PRODUCTS: int = 250_000  # memory budget; larger catalogs read from the DB
+    
+    # Public storefront cache
+    STOREFRONT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    STOREFRONT_CACHE_TTL_SECONDS: float = 30  # max staleness of writes made by other workers
+    STOREFRONT_FEATURED_LIMIT: int = 8  # featured products in the storefront header
+    STOREFRONT_SLUG_CACHE_MAX_ENTRIES: int = 100_000  # active store slug -> id, for event ingestion
+    
+    # Storefront analytics events
+    ANALYTICS_FLUSH_SECONDS: float = 10
+    ANALYTICS_MAX_KEYS: int = 50_000  # buffered (store, day) pairs; events for new pairs beyond this are dropped
+    ANALYTICS_SPILL_DIR: str = "./analytics_spill"  # unflushed events, replayed after a crash
+    
     class Config:
         env_file = ".env"
 
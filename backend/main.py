@@ -3,16 +3,27 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from config import settings
-from database import init_db
-from routers import auth_router, stores_router, products_router, admin_router, ai_router
+from database import init_db, engine
+from routers import auth_router, stores_router, products_router, admin_router, ai_router, orders_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    await check_schema()
+    await init_search_index()
     await seed_initial_data()
+    await backfill_read_models()
+    await warm_caches()
+    await lease_order_worker_id()
+    await start_analytics_buffer()
     yield
     # Shutdown
+    await release_order_worker_id()
+    from services.analytics_buffer import analytics_buffer
+    await analytics_buffer.stop()
+    from services.password_hashing import password_hasher
+    password_hasher.shutdown()
 
 app = FastAPI(
     title=settings.APP_NAME,
@@ -28,6 +39,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 # Routers
@@ -36,6 +48,7 @@ app.include_router(stores_router)
 app.include_router(products_router)
 app.include_router(admin_router)
 app.include_router(ai_router)
+app.include_router(orders_router)
 
 @app.get("/")
 async def root():
@@ -50,6 +63,73 @@ async def root():
 async def health():
     return {"status": "healthy"}
 
+async def check_schema():
+    """Warn when a deployed database lacks indexes/constraints the models declare.
+    
+    create_all() only creates missing tables, so indexes added to existing
+    tables have to be applied to older databases by hand.
+    """
+    from services.schema_check import find_missing_schema_objects
+    
+    async with engine.connect() as conn:
+        missing = await find_missing_schema_objects(conn)
+    for item in missing:
+        print(f"⚠️  Database is missing {item}")
+
+async def init_search_index():
+    """Create the catalog full-text index and its sync triggers"""
+    from services.search import catalog_search
+    
+    async with engine.begin() as conn:
+        await catalog_search.setup(conn)
+
+async def backfill_read_models():
+    """Populate read models (storefront_items, platform counters) on databases that predate them"""
+    from sqlalchemy.exc import IntegrityError
+    from database import async_session
+    from services import counters, storefront_items
+    
+    for name, backfill in (("Storefront read model", storefront_items.backfill), ("Platform counters", counters.backfill)):
+        async with async_session() as db:
+            try:
+                if await backfill(db):
+                    await db.commit()
+                    print(f"✅ {name} backfilled")
+            except IntegrityError:
+                # Another worker backfilled concurrently
+                await db.rollback()
+
+async def warm_caches():
+    """Build the catalog snapshot and facet postings before serving traffic"""
+    from services.catalog_cache import catalog_cache
+    from services.facets import facet_cache
+    
+    await catalog_cache.snapshot()
+    await facet_cache.get()
+
+async def lease_order_worker_id():
+    """Lease a unique worker id for order numbers unless ORDER_WORKER_ID pins one"""
+    from services.order_numbers import order_numbers, worker_id_lease
+    
+    if order_numbers.worker_id is None:
+        await worker_id_lease.start()
+        print(f"✅ Order worker id {worker_id_lease.worker_id} leased")
+
+async def release_order_worker_id():
+    from services.order_numbers import worker_id_lease
+    
+    await worker_id_lease.stop()
+
+async def start_analytics_buffer():
+    """Replay storefront events a crashed process left unflushed, then start periodic flushing"""
+    from services.analytics_buffer import analytics_buffer
+    
+    replayed = await analytics_buffer.replay_spill_files()
+    if replayed:
+        await analytics_buffer.flush()
+        print(f"✅ Replayed {replayed} unflushed storefront events")
+    analytics_buffer.start()
+
 async def seed_initial_data():
     """Seed initial products and admin user"""
     import json
@@ -57,8 +137,8 @@ async def seed_initial_data():
     from sqlalchemy import select
     from database import async_session
     from models.user import User
-    from models.product import Product
     from auth import get_password_hash
+    from services.bulk_import import upsert_products
     
     async with async_session() as db:
         # Check if already seeded
@@ -81,9 +161,7 @@ async def seed_initial_data():
             with open(products_file, "r") as f:
                 products_data = json.load(f)
             
-            for p in products_data:
-                product = Product(**p)
-                db.add(product)
+            await upsert_products(db, products_data)
         
         await db.commit()
         print("✅ Initial data seeded successfully!")
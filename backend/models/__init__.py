@@ -2,6 +2,9 @@ from models.user import User
 from models.store import Store
 from models.product import Product, StoreProduct
 from models.order import Order, OrderItem
-from models.analytics import Analytics
+from models.analytics import Analytics, VisitorSketch
+from models.storefront import StorefrontItem
+from models.counter import PlatformCounter
+from models.lease import WorkerLease
 
-__all__ = ["User", "Store", "Product", "StoreProduct", "Order", "OrderItem", "Analytics"]
+__all__ = ["User", "Store", "Product", "StoreProduct", "Order", "OrderItem", "Analytics", "VisitorSketch", "StorefrontItem", "PlatformCounter", "WorkerLease"]
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, DateTime, ForeignKey, Float, Date
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, Float, Date, UniqueConstraint, LargeBinary
 from sqlalchemy.orm import relationship
 from datetime import datetime, date
 from database import Base
 
 class Analytics(Base):
     __tablename__ = "analytics"
+    __table_args__ = (
+        # One row per store per day; storefront events are upserted into it
+        UniqueConstraint("store_id", "date", name="uq_analytics_store_date"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
@@ -33,3 +37,23 @@ class Analytics(Base):
     
     def __repr__(self):
         return f"<Analytics {self.store_id} - {self.date}>"
+
+
+class VisitorSketch(Base):
+    """HyperLogLog sketch of a store's visitors for one day (see services.hll)"""
+    __tablename__ = "visitor_sketches"
+    __table_args__ = (
+        UniqueConstraint("store_id", "date", name="uq_visitor_sketches_store_date"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
+    date = Column(Date, nullable=False)
+    sketch = Column(LargeBinary, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Relationships
+    store = relationship("Store", back_populates="visitor_sketches")
+    
+    def __repr__(self):
+        return f"<VisitorSketch {self.store_id} - {self.date}>"
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime
+from datetime import datetime
+from database import Base
+
+class PlatformCounter(Base):
+    """One shard of a platform-wide total, maintained by services.counters as rows are written"""
+    __tablename__ = "platform_counter_shards"
+    
+    name = Column(String(50), primary_key=True)
+    shard = Column(Integer, primary_key=True, autoincrement=False, default=0)
+    value = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<PlatformCounter {self.name}[{self.shard}]={self.value}>"
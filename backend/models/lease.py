@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from datetime import datetime
+from database import Base
+
+class WorkerLease(Base):
+    """Order number worker ids held by live processes (see services.order_numbers)"""
+    __tablename__ = "worker_leases"
+    
+    worker_id = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String(255), nullable=False)  # host:pid:nonce of the holding process
+    expires_at = Column(DateTime, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<WorkerLease {self.worker_id} {self.owner}>"
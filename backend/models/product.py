@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, JSON, Index, UniqueConstraint, text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
@@ -6,6 +6,32 @@ from database import Base
 class Product(Base):
     """Central supplier inventory - managed by admin"""
     __tablename__ = "products"
+    __table_args__ = (
+        # Catalog browse / trending: active products ordered by a sort key, id as tie-breaker
+        Index(
+            "ix_products_active_demand", "demand_score", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active = true"),
+            postgresql_include=["name", "category", "suggested_retail"],
+        ),
+        Index(
+            "ix_products_active_created", "created_at", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active = true"),
+        ),
+        Index(
+            "ix_products_active_category_demand", "category", "demand_score", "id",
+            sqlite_where=text("is_active = 1"), postgresql_where=text("is_active = true"),
+        ),
+        # Admin listing (includes inactive products)
+        Index("ix_products_created_id", "created_at", "id"),
+        # Incremental exports / sync by modification time
+        Index("ix_products_updated_id", "updated_at", "id"),
+        # Low stock scan only touches the (small) set of rows below threshold
+        Index(
+            "ix_products_low_stock", "stock_quantity",
+            sqlite_where=text("stock_quantity < low_stock_threshold AND is_active = 1"),
+            postgresql_where=text("stock_quantity < low_stock_threshold AND is_active = true"),
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     sku = Column(String(100), unique=True, nullable=False, index=True)
@@ -49,6 +75,13 @@ class Product(Base):
 class StoreProduct(Base):
     """Products imported into seller stores"""
     __tablename__ = "store_products"
+    __table_args__ = (
+        UniqueConstraint("store_id", "product_id", name="uq_store_products_store_product"),
+        # Reverse lookup: which stores carry a product
+        Index("ix_store_products_product", "product_id"),
+        # Storefront listing: featured first, newest first, per store
+        Index("ix_store_products_store_featured_created", "store_id", "is_featured", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
@@ -1,10 +1,14 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from database import Base
 
 class Store(Base):
     __tablename__ = "stores"
+    __table_args__ = (
+        # "My stores" listing
+        Index("ix_stores_user_created", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -24,6 +28,7 @@ class Store(Base):
     store_products = relationship("StoreProduct", back_populates="store", cascade="all, delete-orphan")
     orders = relationship("Order", back_populates="store", cascade="all, delete-orphan")
     analytics = relationship("Analytics", back_populates="store", cascade="all, delete-orphan")
+    visitor_sketches = relationship("VisitorSketch", back_populates="store", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Store {self.name}>"
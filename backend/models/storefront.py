@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, ForeignKey, Text, Float, JSON, Index
+from datetime import datetime
+from database import Base
+
+class StorefrontItem(Base):
+    """Denormalized public storefront rows - one per active store product.
+    
+    Seller overrides (custom name/description/price) are already resolved
+    against the supplier product, so storefront reads never join. Maintained
+    by services.storefront_items in the same transaction as every write to
+    store_products or products.
+    """
+    __tablename__ = "storefront_items"
+    __table_args__ = (
+        Index("ix_storefront_items_store_featured", "store_id", "is_featured", "created_at", "id"),
+        Index("ix_storefront_items_store_created", "store_id", "created_at", "id"),
+        Index("ix_storefront_items_store_price", "store_id", "price", "id"),
+        Index("ix_storefront_items_product", "product_id"),
+    )
+    
+    id = Column(Integer, ForeignKey("store_products.id"), primary_key=True)  # store product id
+    store_id = Column(Integer, ForeignKey("stores.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    
+    name = Column(String(255), nullable=False)
+    description = Column(Text)
+    price = Column(Float, nullable=False)
+    image_url = Column(String(500))
+    images = Column(JSON, default=list)
+    category = Column(String(100), nullable=False)
+    
+    is_featured = Column(Boolean, default=False)
+    in_stock = Column(Boolean, default=False)
+    created_at = Column(DateTime, default=datetime.utcnow)  # store product import time
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    def __repr__(self):
+        return f"<StorefrontItem {self.id}>"
@@ -3,5 +3,6 @@ from routers.stores import router as stores_router
 from routers.products import router as products_router
 from routers.admin import router as admin_router
 from routers.ai import router as ai_router
+from routers.orders import router as orders_router
 
-__all__ = ["auth_router", "stores_router", "products_router", "admin_router", "ai_router"]
+__all__ = ["auth_router", "stores_router", "products_router", "admin_router", "ai_router", "orders_router"]
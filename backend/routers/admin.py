@@ -1,17 +1,34 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
-from typing import List
+from sqlalchemy import select
+from fastapi.responses import StreamingResponse
+import asyncio
+import csv
+import io
+from typing import List, Optional
 from datetime import datetime, timedelta
 
-from database import get_db
+from database import get_db, async_session
 from models.user import User
-from models.store import Store
 from models.product import Product
 from models.order import Order
 from models.analytics import Analytics
-from schemas import ProductCreate, ProductUpdate, ProductResponse
+from schemas import ProductCreate, ProductUpdate, ProductResponse, ProductSyncRequest, ProductSyncResponse
 from auth import get_current_admin
+from services.principal_cache import Principal, principal_cache
+from services.password_hashing import password_hasher
+from services.storefront_cache import storefront_cache
+from services.invalidation import on_products_changed
+from services.counters import read_counters
+from services.bulk_import import import_feed
+from services.stock_sync import apply_deltas
+from services.low_stock import StockLevel, crossings, low_stock_alerts
+from services.analytics_buffer import analytics_buffer
+from services.storefront_items import sync_products
+from services.pagination import CURSOR_HEADER, keyset_paginate, page_with_cursor
+from services.projection import (
+    PRODUCT_FIELDS, parse_fields, product_columns, project, json_response, to_json
+)
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -19,7 +36,7 @@ router = APIRouter(prefix="/api/admin", tags=["Admin"])
 async def create_product(
     product_data: ProductCreate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Add a new product to supplier inventory"""
     # Check SKU unique
@@ -31,6 +48,8 @@ async def create_product(
     db.add(product)
     await db.commit()
     await db.refresh(product)
+    await on_products_changed(db, [product.id])
+    low_stock_alerts.publish(crossings({}, [StockLevel.of(product)]))
     return product
 
 @router.put("/products/{product_id}", response_model=ProductResponse)
@@ -38,7 +57,7 @@ async def update_product(
     product_id: int,
     product_data: ProductUpdate,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Update product in supplier inventory"""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -47,19 +66,23 @@ async def update_product(
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     
+    before = {product.id: StockLevel.of(product)}
     update_data = product_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(product, field, value)
+    await sync_products(db, [product.id])
     
     await db.commit()
     await db.refresh(product)
+    await on_products_changed(db, [product.id])
+    low_stock_alerts.publish(crossings(before, [StockLevel.of(product)]))
     return product
 
 @router.delete("/products/{product_id}")
 async def delete_product(
     product_id: int,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Delete product from inventory"""
     result = await db.execute(select(Product).where(Product.id == product_id))
@@ -69,73 +92,237 @@ async def delete_product(
         raise HTTPException(status_code=404, detail="Product not found")
     
     # Soft delete
+    before = {product.id: StockLevel.of(product)}
     product.is_active = False
+    await sync_products(db, [product.id])
     await db.commit()
+    await on_products_changed(db, [product.id])
+    low_stock_alerts.publish(crossings(before, [StockLevel.of(product)]))
     return {"message": "Product deactivated"}
 
 @router.get("/products", response_model=List[ProductResponse])
 async def list_all_products(
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin),
-    include_inactive: bool = False
+    admin: Principal = Depends(get_current_admin),
+    include_inactive: bool = False,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
 ):
-    """List all products (admin view)"""
-    query = select(Product)
+    """List all products, newest first (admin view, paginated via X-Next-Cursor).
+    
+    `fields=summary` (or a comma separated column list) returns lightweight rows.
+    """
+    names = parse_fields(fields, required=("id", "created_at"))
+    query = select(Product) if names is None else select(*product_columns(names))
     if not include_inactive:
         query = query.where(Product.is_active == True)
-    query = query.order_by(Product.created_at.desc())
+    query = keyset_paginate(
+        query,
+        [Product.created_at, Product.id],
+        key="admin_products",
+        descending=True,
+        cursor=cursor,
+        limit=limit,
+    )
     
     result = await db.execute(query)
-    return result.scalars().all()
+    rows = result.scalars().all() if names is None else result.all()
+    products, next_cursor = page_with_cursor(
+        rows, limit, "admin_products", lambda p: [p.created_at, p.id]
+    )
+    
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    if names is not None:
+        return json_response([project(p, names) for p in products], response.headers)
+    return products
+
+@router.post("/products/import")
+async def import_products(
+    request: Request,
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    db: AsyncSession = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """Bulk upsert supplier products from a streamed NDJSON or CSV request body.
+    
+    Rows are matched on SKU (existing products are updated). CSV feeds use the
+    export layout. Invalid rows are skipped and reported with their row number.
+    """
+    return await import_feed(db, request.stream(), format)
+
+@router.post("/products/sync", response_model=ProductSyncResponse)
+async def sync_products_stock(
+    data: ProductSyncRequest,
+    db: AsyncSession = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """Apply supplier stock/price deltas by SKU in one transaction.
+    
+    Only rows whose values actually change are written and reported, so
+    caches are invalidated for those products alone.
+    """
+    changed, unchanged, missing, alerts = await apply_deltas(db, data.items)
+    await db.commit()
+    if changed:
+        await on_products_changed(db, changed)
+    low_stock_alerts.publish(alerts)
+    return {"changed": changed, "unchanged": unchanged, "missing": missing}
+
+EXPORT_FIELDS = PRODUCT_FIELDS + ("low_stock_threshold", "updated_at")
+EXPORT_BATCH_SIZE = 1000
+
+@router.get("/products/export")
+async def export_products(
+    admin: Principal = Depends(get_current_admin),
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    updated_since: Optional[datetime] = None,
+    include_inactive: bool = True
+):
+    """Stream the supplier catalog as NDJSON or CSV with constant memory.
+    
+    Rows are ordered by (updated_at, id); pass the last exported updated_at as
+    `updated_since` for incremental syncs.
+    """
+    query = select(*product_columns(EXPORT_FIELDS))
+    if updated_since:
+        query = query.where(Product.updated_at >= updated_since)
+    if not include_inactive:
+        query = query.where(Product.is_active == True)
+    query = query.order_by(Product.updated_at, Product.id).execution_options(yield_per=EXPORT_BATCH_SIZE)
+    
+    async def ndjson_rows():
+        # Own session: request dependencies are torn down before the body is streamed
+        async with async_session() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                yield "".join(to_json(project(row, EXPORT_FIELDS)) + "\n" for row in partition)
+    
+    async def csv_rows():
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_FIELDS)
+        async with async_session() as session:
+            result = await session.stream(query)
+            async for partition in result.partitions():
+                for row in partition:
+                    writer.writerow([
+                        to_json(value) if isinstance(value, (list, dict)) else
+                        value.isoformat() if isinstance(value, datetime) else value
+                        for value in row
+                    ])
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        if buffer.tell():
+            yield buffer.getvalue()
+    
+    if format == "csv":
+        return StreamingResponse(
+            csv_rows(), media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="products.csv"'}
+        )
+    return StreamingResponse(ndjson_rows(), media_type="application/x-ndjson")
 
 @router.get("/analytics")
 async def get_platform_analytics(
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Get platform-wide analytics"""
-    # Total counts
-    users_count = await db.execute(select(func.count(User.id)))
-    stores_count = await db.execute(select(func.count(Store.id)))
-    products_count = await db.execute(select(func.count(Product.id)).where(Product.is_active == True))
-    orders_count = await db.execute(select(func.count(Order.id)))
-    
-    # Revenue
-    total_revenue = await db.execute(select(func.sum(Order.total_amount)))
-    
-    # Recent activity
-    recent_orders = await db.execute(
-        select(Order).order_by(Order.created_at.desc()).limit(10)
-    )
+    async def recent_orders():
+        async with async_session() as session:
+            result = await session.execute(
+                select(Order.id, Order.order_number, Order.total_amount, Order.status)
+                .order_by(Order.created_at.desc())
+                .limit(10)
+            )
+            return result.all()
     
-    # Low stock products
-    low_stock = await db.execute(
-        select(Product)
-        .where(Product.stock_quantity < Product.low_stock_threshold, Product.is_active == True)
-        .limit(10)
-    )
+    async def low_stock():
+        # Partial index ix_products_low_stock
+        async with async_session() as session:
+            result = await session.execute(
+                select(Product.id, Product.name, Product.sku, Product.stock_quantity)
+                .where(Product.stock_quantity < Product.low_stock_threshold, Product.is_active == True)
+                .limit(10)
+            )
+            return result.all()
+    
+    # Maintained totals instead of COUNT/SUM scans; the three reads run concurrently
+    totals, orders, products = await asyncio.gather(read_counters(db), recent_orders(), low_stock())
     
     return {
-        "total_users": users_count.scalar() or 0,
-        "total_stores": stores_count.scalar() or 0,
-        "total_products": products_count.scalar() or 0,
-        "total_orders": orders_count.scalar() or 0,
-        "total_revenue": total_revenue.scalar() or 0,
+        "total_users": int(totals.get("users", 0)),
+        "total_stores": int(totals.get("stores", 0)),
+        "total_products": int(totals.get("products", 0)),
+        "total_orders": int(totals.get("orders", 0)),
+        "total_revenue": totals.get("revenue", 0),
         "recent_orders": [
             {"id": o.id, "order_number": o.order_number, "total": o.total_amount, "status": o.status}
-            for o in recent_orders.scalars().all()
+            for o in orders
         ],
         "low_stock_products": [
             {"id": p.id, "name": p.name, "sku": p.sku, "stock": p.stock_quantity}
-            for p in low_stock.scalars().all()
+            for p in products
         ]
     }
 
+ALERT_HEARTBEAT_SECONDS = 15
+
+@router.get("/alerts/low-stock")
+async def stream_low_stock_alerts(
+    request: Request,
+    admin: Principal = Depends(get_current_admin)
+):
+    """Server-sent events for products crossing their low-stock threshold.
+    
+    Each `low_stock` event carries the product, its stock and threshold and
+    `state` ("low" or "ok"). Comment lines are sent as heartbeats.
+    """
+    async def events():
+        with low_stock_alerts.subscribe() as queue:
+            yield ": subscribed\n\n"
+            while not await request.is_disconnected():
+                try:
+                    alert = await asyncio.wait_for(queue.get(), ALERT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"event: low_stock\ndata: {to_json(alert)}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/metrics")
+async def get_runtime_metrics(admin: Principal = Depends(get_current_admin)):
+    """In-process runtime metrics for this worker"""
+    return {
+        "password_hashing": password_hasher.metrics(),
+        "principal_cache": {"hits": principal_cache.hits, "misses": principal_cache.misses},
+        "storefront_cache": {
+            "hits": storefront_cache.hits,
+            "misses": storefront_cache.misses,
+            "bytes": storefront_cache.size,
+        },
+        "low_stock_alerts": {
+            "subscribers": low_stock_alerts.subscribers,
+            "published": low_stock_alerts.published,
+            "dropped": low_stock_alerts.dropped,
+        },
+        "analytics_buffer": analytics_buffer.metrics(),
+    }
+
 @router.post("/users/{user_id}/make-admin")
 async def make_user_admin(
     user_id: int,
     db: AsyncSession = Depends(get_db),
-    admin: User = Depends(get_current_admin)
+    admin: Principal = Depends(get_current_admin)
 ):
     """Promote user to admin"""
     result = await db.execute(select(User).where(User.id == user_id))
@@ -146,4 +333,26 @@ async def make_user_admin(
     
     user.role = "admin"
     await db.commit()
+    principal_cache.invalidate(user.id)
     return {"message": f"User {user.email} is now an admin"}
+
+@router.post("/users/{user_id}/deactivate")
+async def deactivate_user(
+    user_id: int,
+    db: AsyncSession = Depends(get_db),
+    admin: Principal = Depends(get_current_admin)
+):
+    """Disable a user account"""
+    if user_id == admin.id:
+        raise HTTPException(status_code=400, detail="Cannot deactivate yourself")
+    
+    result = await db.execute(select(User).where(User.id == user_id))
+    user = result.scalar_one_or_none()
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    
+    user.is_active = False
+    await db.commit()
+    principal_cache.invalidate(user.id)
+    return {"message": f"User {user.email} deactivated"}
@@ -1,39 +1,42 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
+from sqlalchemy.orm import selectinload
 from typing import List, Optional
 
 from database import get_db
-from models.user import User
 from models.store import Store
 from models.product import Product, StoreProduct
 from models.order import Order
 from schemas import AIRecommendRequest, AIRecommendResponse, AIChatRequest, AIChatResponse
-from auth import get_current_user
+from auth import get_current_user, owned_store, find_owned_store
+from services.principal_cache import Principal
 from ai.recommender import AIRecommender
+from services.catalog_cache import catalog_cache
 
 router = APIRouter(prefix="/api/ai", tags=["AI Assistant"])
 
 recommender = AIRecommender()
 
+get_store_with_products = owned_store(
+    selectinload(Store.store_products).selectinload(StoreProduct.product)
+)
+
 @router.post("/recommend", response_model=AIRecommendResponse)
 async def get_recommendations(
     request: AIRecommendRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get AI-powered product recommendations"""
     # Get context data
     store_data = None
     if request.store_id:
-        result = await db.execute(select(Store).where(Store.id == request.store_id))
-        store = result.scalar_one_or_none()
-        if store and store.user_id == current_user.id:
-            # Get store products
-            result = await db.execute(
-                select(StoreProduct).where(StoreProduct.store_id == request.store_id)
-            )
-            store_products = result.scalars().all()
+        store = await find_owned_store(
+            db, current_user.id, request.store_id, selectinload(Store.store_products)
+        )
+        if store:
+            store_products = store.store_products
             store_data = {
                 "name": store.name,
                 "product_count": len(store_products),
@@ -41,13 +44,17 @@ async def get_recommendations(
             }
     
     # Get trending products
-    result = await db.execute(
-        select(Product)
-        .where(Product.is_active == True)
-        .order_by(Product.demand_score.desc())
-        .limit(20)
-    )
-    trending_products = result.scalars().all()
+    snapshot = await catalog_cache.snapshot()
+    if snapshot is not None:
+        trending_products = snapshot.trending(20)
+    else:
+        result = await db.execute(
+            select(Product)
+            .where(Product.is_active == True)
+            .order_by(Product.demand_score.desc(), Product.id.desc())
+            .limit(20)
+        )
+        trending_products = result.scalars().all()
     
     # Generate recommendations
     recommendations = recommender.get_product_recommendations(
@@ -65,16 +72,15 @@ async def get_recommendations(
 async def chat_with_ai(
     request: AIChatRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Chat with AI assistant for ecommerce guidance"""
     # Build context
     context = {"user_name": current_user.full_name or current_user.email.split("@")[0]}
     
     if request.store_id:
-        result = await db.execute(select(Store).where(Store.id == request.store_id))
-        store = result.scalar_one_or_none()
-        if store and store.user_id == current_user.id:
+        store = await find_owned_store(db, current_user.id, request.store_id)
+        if store:
             # Get store stats
             result = await db.execute(
                 select(func.count(StoreProduct.id)).where(StoreProduct.store_id == request.store_id)
@@ -105,33 +111,11 @@ async def chat_with_ai(
 async def get_store_insights(
     store_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_store_with_products)
 ):
     """Get AI-generated insights for a store"""
-    # Verify store ownership
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
-    # Get store products
-    result = await db.execute(
-        select(StoreProduct)
-        .where(StoreProduct.store_id == store_id, StoreProduct.is_active == True)
-    )
-    store_products = result.scalars().all()
-    product_ids = [sp.product_id for sp in store_products]
-    
-    # Get product details
-    products = []
-    if product_ids:
-        result = await db.execute(
-            select(Product).where(Product.id.in_(product_ids))
-        )
-        products = result.scalars().all()
+    # Store products and their catalog rows arrive eager-loaded with the store
+    products = [sp.product for sp in store.store_products if sp.is_active]
     
     # Get all catalog products for gap analysis
     result = await db.execute(
@@ -72,11 +72,13 @@ from database import get_db
 from models.user import User
 from schemas import UserCreate, UserLogin, UserResponse, Token
 from auth import (
-    get_password_hash,
-    verify_password,
+    get_password_hash_async,
+    verify_password_async,
     create_access_token,
+    access_token_claims,
     get_current_user
 )
+from services.principal_cache import Principal
 from config import settings
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
@@ -101,7 +103,7 @@ async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     # Create new user
     user = User(
         email=user_data.email,
-        password_hash=get_password_hash(user_data.password),
+        password_hash=await get_password_hash_async(user_data.password),
         full_name=user_data.full_name,
         role="seller",
         is_active=True
@@ -124,7 +126,7 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
     )
     user = result.scalar_one_or_none()
     
-    if not user or not verify_password(
+    if not user or not await verify_password_async(
         credentials.password,
         user.password_hash
     ):
@@ -139,9 +141,8 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
             detail="Account is disabled"
         )
     
-    # IMPORTANT: sub must be STRING
     access_token = create_access_token(
-        data={"sub": str(user.id)},
+        data=access_token_claims(user),
         expires_delta=timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
@@ -156,6 +157,16 @@ async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
 # ---------------- Current User ----------------
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(
+    current_user: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
     """Get current logged-in user"""
-    return current_user
\ No newline at end of file
+    # The profile is read fresh; the principal may come from token claims
+    result = await db.execute(
+        select(User).where(User.id == current_user.id)
+    )
+    user = result.scalar_one_or_none()
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
\ No newline at end of file
@@ -0,0 +1,101 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select
+from sqlalchemy.orm import selectinload
+from typing import List, Optional
+from datetime import datetime
+
+from database import get_db
+from models.store import Store
+from models.order import Order, OrderStatus
+from schemas import OrderCreate, OrderResponse
+from auth import get_owned_store
+from services.checkout import place_order
+from services.invalidation import on_stock_changed
+from services.low_stock import low_stock_alerts
+from services.pagination import CURSOR_HEADER, keyset_paginate, page_with_cursor
+
+router = APIRouter(prefix="/api", tags=["Orders"])
+
+@router.post("/stores/public/{slug}/orders", response_model=OrderResponse, status_code=201)
+async def create_order(
+    slug: str,
+    data: OrderCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    """Place an order on a public storefront (no auth required).
+    
+    Stock is reserved atomically per line; if any line is short the order is
+    rejected with 409 and nothing is written.
+    """
+    result = await db.execute(
+        select(Store.id).where(Store.slug == slug, Store.is_active == True)
+    )
+    store_id = result.scalar_one_or_none()
+    if store_id is None:
+        raise HTTPException(status_code=404, detail="Store not found")
+    
+    order, items, effects = await place_order(db, store_id, data)
+    await db.commit()
+    
+    await on_stock_changed(db, effects["sold_out"])
+    low_stock_alerts.publish(effects["alerts"])
+    
+    return {
+        "id": order.id,
+        "store_id": order.store_id,
+        "order_number": order.order_number,
+        "customer_name": order.customer_name,
+        "customer_email": order.customer_email,
+        "customer_phone": order.customer_phone,
+        "shipping_address": order.shipping_address,
+        "notes": order.notes,
+        "subtotal": order.subtotal,
+        "shipping_cost": order.shipping_cost,
+        "tax": order.tax,
+        "total_amount": order.total_amount,
+        "status": order.status,
+        "created_at": order.created_at,
+        "items": items
+    }
+
+@router.get("/stores/{store_id}/orders", response_model=List[OrderResponse])
+async def get_store_orders(
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    store: Store = Depends(get_owned_store),
+    status: Optional[str] = Query(None, regex=f"^({'|'.join(s.value for s in OrderStatus)})$"),
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None
+):
+    """A store's orders, newest first (next page via X-Next-Cursor).
+    
+    Served by ix_orders_store_created / ix_orders_store_status_created; the
+    items of the whole page are loaded in one batch.
+    """
+    query = select(Order).options(selectinload(Order.items)).where(Order.store_id == store.id)
+    if status:
+        query = query.where(Order.status == status)
+    if created_from:
+        query = query.where(Order.created_at >= created_from)
+    if created_to:
+        query = query.where(Order.created_at < created_to)
+    
+    query = keyset_paginate(
+        query,
+        [Order.created_at, Order.id],
+        key="store_orders",
+        descending=True,
+        cursor=cursor,
+        limit=limit,
+    )
+    result = await db.execute(query)
+    orders, next_cursor = page_with_cursor(
+        result.scalars().all(), limit, "store_orders", lambda o: [o.created_at, o.id]
+    )
+    
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return orders
@@ -1,41 +1,76 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
 from typing import List, Optional
+from datetime import datetime
 
 from database import get_db
-from models.user import User
 from models.store import Store
 from models.product import Product, StoreProduct
 from schemas import (
-    ProductResponse, StoreProductCreate, StoreProductUpdate, StoreProductResponse
+    ProductResponse, ProductBatchRequest, ProductBatchResponse,
+    StoreProductCreate, StoreProductUpdate, StoreProductResponse
 )
-from auth import get_current_user
+from auth import get_current_user, get_owned_store
+from services.principal_cache import Principal
+from services.search import catalog_search
+from services.catalog_cache import catalog_cache
+from services.facets import facet_cache, tag_condition
+from services.etag import make_etag, etag_matches, not_modified, set_etag
+from services.projection import parse_fields, product_columns, project, json_response
+from services.invalidation import on_store_changed
+from services.storefront_items import sync_store_products, remove_store_products
+from services.pagination import CURSOR_HEADER, decode_cursor, keyset_paginate, page_with_cursor
 
 router = APIRouter(prefix="/api", tags=["Products"])
 
 @router.get("/products", response_model=List[ProductResponse])
 async def browse_catalog(
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    tag: Optional[str] = None,
     search: Optional[str] = None,
     min_price: Optional[float] = None,
     max_price: Optional[float] = None,
     in_stock: Optional[bool] = None,
-    sort_by: str = Query("demand_score", regex="^(name|base_price|demand_score|created_at)$"),
+    sort_by: Optional[str] = Query(None, regex="^(relevance|name|base_price|demand_score|created_at)$"),
     order: str = Query("desc", regex="^(asc|desc)$"),
-    limit: int = Query(50, le=100),
+    limit: int = Query(50, ge=1, le=100),
     offset: int = 0,
-    current_user: User = Depends(get_current_user)
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    current_user: Principal = Depends(get_current_user)
 ):
-    """Browse supplier product catalog"""
+    """Browse supplier product catalog.
+    
+    Pass the X-Next-Cursor header of a response back as `cursor` to get the next page.
+    `fields=summary` (or a comma separated column list) returns lightweight rows.
+    """
+    # The body is a function of the catalog rows' versions and the query string;
+    # the fingerprint is derived from the rows, so every worker agrees on it
+    snapshot = await catalog_cache.snapshot()
+    etag = None
+    if snapshot is not None:
+        etag = make_etag("catalog", snapshot.fingerprint, sorted(request.query_params.multi_items()))
+        if etag_matches(request, etag):
+            return not_modified(etag)
+    
     query = select(Product).where(Product.is_active == True)
     
+    rank = None
     if category:
         query = query.where(Product.category == category)
+    if subcategory:
+        query = query.where(Product.subcategory == subcategory)
+    if tag:
+        query = query.where(tag_condition(tag))
     if search:
-        query = query.where(Product.name.ilike(f"%{search}%"))
+        query, rank = catalog_search.apply(query, search)
     if min_price:
         query = query.where(Product.suggested_retail >= min_price)
     if max_price:
@@ -43,37 +78,190 @@ async def browse_catalog(
     if in_stock:
         query = query.where(Product.stock_quantity > 0)
     
-    # Sorting
-    sort_column = getattr(Product, sort_by)
-    if order == "desc":
-        query = query.order_by(sort_column.desc())
+    # Sorting - searches rank by relevance unless another sort is requested
+    if sort_by is None:
+        sort_by = "relevance" if search else "demand_score"
+    
+    # Projection: select only the requested columns (plus what the cursor needs)
+    names = parse_fields(fields, required=("id", sort_by if sort_by != "relevance" else "demand_score"))
+    
+    async def fetch(query):
+        if names is None:
+            return (await db.execute(query)).scalars().all()
+        return (await db.execute(query.with_only_columns(*product_columns(names)))).all()
+    
+    if sort_by == "relevance" and rank is not None:
+        # Relevance is computed per query, so its cursor carries a position rather than a seek key
+        position = offset
+        if cursor:
+            position = decode_cursor(cursor, "relevance", [Product.id])[0]
+            if not isinstance(position, int) or position < 0:
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = (
+            query.order_by(rank, Product.demand_score.desc(), Product.id.desc())
+            .offset(position)
+            .limit(limit + 1)
+        )
+        products, next_cursor = page_with_cursor(
+            await fetch(query), limit, "relevance", lambda p: [position + limit]
+        )
     else:
-        query = query.order_by(sort_column.asc())
+        if sort_by == "relevance":
+            sort_by = "demand_score"
+        sort_column = getattr(Product, sort_by)
+        key = f"{sort_by}:{order}"
+        
+        # Non-search browsing is served from the in-memory catalog snapshot
+        if snapshot is not None and not search:
+            after = tuple(decode_cursor(cursor, key, [sort_column, Product.id])) if cursor else None
+            if after and None in after:
+                # Snapshot sort keys are never NULL, so a NULL cannot come from a real page
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            rows = snapshot.browse(
+                sort_by,
+                descending=order == "desc",
+                limit=limit + 1,
+                after=after,
+                offset=0 if cursor else offset,
+                category=category,
+                subcategory=subcategory,
+                tag=tag,
+                min_price=min_price,
+                max_price=max_price,
+                in_stock=in_stock,
+            )
+        else:
+            if offset and not cursor:
+                query = query.offset(offset)
+            query = keyset_paginate(
+                query,
+                [sort_column, Product.id],
+                key=key,
+                descending=order == "desc",
+                cursor=cursor,
+                limit=limit,
+            )
+            rows = await fetch(query)
+        
+        products, next_cursor = page_with_cursor(
+            rows, limit, key, lambda p: [getattr(p, sort_by), p.id]
+        )
     
-    query = query.offset(offset).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    if etag:
+        set_etag(response, etag)
+    if names is not None:
+        return json_response([project(p, names) for p in products], response.headers)
+    return products
+
+@router.get("/products/facets")
+async def get_facets(
+    db: AsyncSession = Depends(get_db),
+    category: Optional[str] = None,
+    subcategory: Optional[str] = None,
+    tag: Optional[str] = None,
+    search: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    in_stock: Optional[bool] = None,
+    current_user: Principal = Depends(get_current_user)
+):
+    """Product counts per category, subcategory, price bucket, stock and tag
+    for the same filters browse_catalog accepts"""
+    filters = {}
+    if category:
+        filters["category"] = category
+    if subcategory:
+        filters["subcategory"] = subcategory
+    if tag:
+        filters["tag"] = tag
+    if in_stock:
+        filters["in_stock"] = "true"
+    
+    restrict_to = None
+    if search:
+        query, _ = catalog_search.apply(select(Product.id).where(Product.is_active == True), search)
+        result = await db.execute(query)
+        restrict_to = frozenset(result.scalars().all())
+    
+    index, products = await facet_cache.get()
+    return index.counts(products, filters, min_price, max_price, restrict_to)
+
+@router.post("/products/batch", response_model=ProductBatchResponse)
+async def get_products_batch(
+    data: ProductBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    current_user: Principal = Depends(get_current_user)
+):
+    """Get many products by id in one call (cache first, then a single IN query)"""
+    ids = list(dict.fromkeys(data.ids))
+    found = {}
+    
+    snapshot = await catalog_cache.snapshot()
+    if snapshot is not None:
+        for product_id in ids:
+            product = snapshot.get(product_id)
+            if product is not None:
+                found[product_id] = product
+    
+    misses = [product_id for product_id in ids if product_id not in found]
+    if misses:
+        result = await db.execute(select(Product).where(Product.id.in_(misses)))
+        for product in result.scalars().all():
+            found[product.id] = product
+    
+    return {
+        "products": [found[product_id] for product_id in ids if product_id in found],
+        "missing": [product_id for product_id in ids if product_id not in found],
+    }
 
 @router.get("/products/{product_id}", response_model=ProductResponse)
 async def get_product(
     product_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get product details"""
+    snapshot = await catalog_cache.snapshot()
+    if snapshot is not None and product_id in snapshot.products:
+        etag = make_etag("product", product_id, snapshot.row_versions[product_id])
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        set_etag(response, etag)
+        return snapshot.get(product_id)
+    
+    # Not cached (caching off, or created by another worker since the last refresh).
+    # Check the row version before loading the row.
+    result = await db.execute(select(Product.updated_at).where(Product.id == product_id))
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    
+    etag = make_etag("product", product_id, row.updated_at)
+    if etag_matches(request, etag):
+        return not_modified(etag)
+    
     result = await db.execute(select(Product).where(Product.id == product_id))
     product = result.scalar_one_or_none()
     
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
+    set_etag(response, etag)
     return product
 
 @router.get("/products/categories/list")
 async def get_categories(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get all product categories"""
+    snapshot = await catalog_cache.snapshot()
+    if snapshot is not None:
+        return {"categories": list(snapshot.categories)}
+    
     result = await db.execute(
         select(Product.category).where(Product.is_active == True).distinct()
     )
@@ -86,18 +274,9 @@ async def import_product(
     store_id: int,
     data: StoreProductCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Import a product from catalog to store (1-click import)"""
-    # Verify store ownership
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
     # Verify product exists
     result = await db.execute(select(Product).where(Product.id == data.product_id))
     product = result.scalar_one_or_none()
@@ -125,7 +304,16 @@ async def import_product(
         is_featured=data.is_featured
     )
     db.add(store_product)
-    await db.commit()
+    store.updated_at = datetime.utcnow()  # storefront version
+    try:
+        await db.flush()
+        await sync_store_products(db, [store_product.id])
+        await db.commit()
+    except IntegrityError:
+        # Lost a race with a concurrent import of the same product
+        await db.rollback()
+        raise HTTPException(status_code=400, detail="Product already in store")
+    on_store_changed(store_id)
     
     # Reload with product relationship
     result = await db.execute(
@@ -138,26 +326,73 @@ async def import_product(
 @router.get("/stores/{store_id}/products", response_model=List[StoreProductResponse])
 async def get_store_products(
     store_id: int,
+    response: Response,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    store: Store = Depends(get_owned_store)
 ):
-    """Get all products in a store"""
-    # Verify store ownership
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
+    """Get products in a store, featured first (paginated via X-Next-Cursor).
     
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
+    `fields=summary` (or a comma separated product column list) returns
+    lightweight rows with only those product columns.
+    """
+    names = parse_fields(fields)
+    if names is not None:
+        return await _store_products_projection(db, store_id, names, limit, cursor)
     
-    result = await db.execute(
+    query = keyset_paginate(
         select(StoreProduct)
         .options(selectinload(StoreProduct.product))
-        .where(StoreProduct.store_id == store_id)
-        .order_by(StoreProduct.is_featured.desc(), StoreProduct.created_at.desc())
+        .where(StoreProduct.store_id == store_id),
+        [StoreProduct.is_featured, StoreProduct.created_at, StoreProduct.id],
+        key="store_products",
+        descending=True,
+        cursor=cursor,
+        limit=limit,
+    )
+    result = await db.execute(query)
+    store_products, next_cursor = page_with_cursor(
+        result.scalars().all(), limit, "store_products",
+        lambda sp: [sp.is_featured, sp.created_at, sp.id]
     )
-    return result.scalars().all()
+    
+    if next_cursor:
+        response.headers[CURSOR_HEADER] = next_cursor
+    return store_products
+
+STORE_PRODUCT_FIELDS = (
+    "id", "store_id", "product_id", "custom_name", "custom_price", "is_featured", "is_active", "created_at",
+)
+
+async def _store_products_projection(db, store_id, names, limit, cursor):
+    """Store products joined to the requested product columns in one Core query"""
+    query = keyset_paginate(
+        select(
+            *[getattr(StoreProduct, f) for f in STORE_PRODUCT_FIELDS],
+            *[column.label(f"product_{name}") for name, column in zip(names, product_columns(names))],
+        )
+        .join(Product, Product.id == StoreProduct.product_id)
+        .where(StoreProduct.store_id == store_id),
+        [StoreProduct.is_featured, StoreProduct.created_at, StoreProduct.id],
+        key="store_products",
+        descending=True,
+        cursor=cursor,
+        limit=limit,
+    )
+    result = await db.execute(query)
+    rows, next_cursor = page_with_cursor(
+        result.all(), limit, "store_products",
+        lambda row: [row.is_featured, row.created_at, row.id]
+    )
+    
+    items = []
+    for row in rows:
+        item = {f: getattr(row, f) for f in STORE_PRODUCT_FIELDS}
+        item["product"] = {name: getattr(row, f"product_{name}") for name in names}
+        items.append(item)
+    return json_response(items, {CURSOR_HEADER: next_cursor} if next_cursor else None)
 
 @router.put("/stores/{store_id}/products/{product_id}", response_model=StoreProductResponse)
 async def update_store_product(
@@ -165,18 +400,9 @@ async def update_store_product(
     product_id: int,
     data: StoreProductUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Update a product in seller's store"""
-    # Verify store ownership
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
     result = await db.execute(
         select(StoreProduct)
         .options(selectinload(StoreProduct.product))
@@ -190,8 +416,11 @@ async def update_store_product(
     update_data = data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(store_product, field, value)
+    store.updated_at = datetime.utcnow()  # storefront version
+    await sync_store_products(db, [store_product.id])
     
     await db.commit()
+    on_store_changed(store_id)
     await db.refresh(store_product)
     return store_product
 
@@ -200,18 +429,9 @@ async def remove_store_product(
     store_id: int,
     product_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Remove a product from seller's store"""
-    # Verify store ownership
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
     result = await db.execute(
         select(StoreProduct).where(
             StoreProduct.store_id == store_id,
@@ -223,6 +443,10 @@ async def remove_store_product(
     if not store_product:
         raise HTTPException(status_code=404, detail="Product not in store")
     
+    # Read model row first: it references the store product
+    await remove_store_products(db, [store_product.id])
     await db.delete(store_product)
+    store.updated_at = datetime.utcnow()  # storefront version
     await db.commit()
+    on_store_changed(store_id)
     return {"message": "Product removed from store"}
@@ -1,16 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import List
+from sqlalchemy import select, func, or_
+from sqlalchemy.exc import IntegrityError
+from typing import List, Optional
+from collections import Counter
+from datetime import date, timedelta
 import re
 
+from config import settings
 from database import get_db
-from models.user import User
 from models.store import Store
-from models.product import StoreProduct
-from schemas import StoreCreate, StoreUpdate, StoreResponse, StoreProductResponse
-from auth import get_current_user
+from models.storefront import StorefrontItem
+from models.analytics import VisitorSketch
+from schemas import StoreCreate, StoreUpdate, StoreResponse, StoreProductResponse, StorefrontEvents
+from auth import get_current_user, get_owned_store
+from services.principal_cache import Principal
+from services.etag import make_etag, etag_matches, not_modified
+from services.projection import to_json
+from services.storefront_cache import storefront_cache, CachedStorefront
+from services.invalidation import on_store_changed
+from services.storefront_items import remove_store
+from services.analytics_buffer import analytics_buffer
+from services.hll import HyperLogLog
+from services.pagination import CURSOR_HEADER, keyset_paginate, page_with_cursor
 
 router = APIRouter(prefix="/api/stores", tags=["Stores"])
 
@@ -20,42 +32,54 @@ def generate_slug(name: str) -> str:
     slug = re.sub(r'[\s_]+', '-', slug)
     return slug.strip('-')
 
+SLUG_ATTEMPTS = 5
+
+async def next_free_slug(db: AsyncSession, base_slug: str) -> str:
+    """`base` if free, else `base-N` past the highest numeric suffix - one query"""
+    result = await db.execute(
+        select(Store.slug).where(or_(Store.slug == base_slug, Store.slug.like(f"{base_slug}-%")))
+    )
+    taken = result.scalars().all()
+    if base_slug not in taken:
+        return base_slug
+    suffixes = [int(s[len(base_slug) + 1:]) for s in taken if s[len(base_slug) + 1:].isdigit()]
+    return f"{base_slug}-{max(suffixes, default=0) + 1}"
+
 @router.post("", response_model=StoreResponse)
 async def create_store(
     store_data: StoreCreate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Create a new store"""
     base_slug = generate_slug(store_data.name)
-    slug = base_slug
-    counter = 1
-    
-    # Ensure unique slug
-    while True:
-        result = await db.execute(select(Store).where(Store.slug == slug))
-        if not result.scalar_one_or_none():
-            break
-        slug = f"{base_slug}-{counter}"
-        counter += 1
-    
-    store = Store(
-        user_id=current_user.id,
-        name=store_data.name,
-        slug=slug,
-        description=store_data.description,
-        template=store_data.template,
-        primary_color=store_data.primary_color
-    )
-    db.add(store)
-    await db.commit()
-    await db.refresh(store)
-    return store
+    user_id = current_user.id  # survives the rollback below
+    
+    for _ in range(SLUG_ATTEMPTS):
+        store = Store(
+            user_id=user_id,
+            name=store_data.name,
+            slug=await next_free_slug(db, base_slug),
+            description=store_data.description,
+            template=store_data.template,
+            primary_color=store_data.primary_color
+        )
+        db.add(store)
+        try:
+            await db.commit()
+        except IntegrityError:
+            # A concurrent create took the same slug; look again
+            await db.rollback()
+            continue
+        await db.refresh(store)
+        return store
+    
+    raise HTTPException(status_code=409, detail="Could not allocate a store URL, please retry")
 
 @router.get("/my", response_model=List[StoreResponse])
 async def get_my_stores(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user: Principal = Depends(get_current_user)
 ):
     """Get all stores owned by current user"""
     result = await db.execute(
@@ -67,17 +91,9 @@ async def get_my_stores(
 async def get_store(
     store_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Get store by ID"""
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
     return store
 
 @router.put("/{store_id}", response_model=StoreResponse)
@@ -85,22 +101,15 @@ async def update_store(
     store_id: int,
     store_data: StoreUpdate,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Update store settings"""
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
     update_data = store_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(store, field, value)
     
     await db.commit()
+    on_store_changed(store.id)
     await db.refresh(store)
     return store
 
@@ -108,52 +117,134 @@ async def update_store(
 async def delete_store(
     store_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    store: Store = Depends(get_owned_store)
 ):
     """Delete a store"""
-    result = await db.execute(select(Store).where(Store.id == store_id))
-    store = result.scalar_one_or_none()
-    
-    if not store:
-        raise HTTPException(status_code=404, detail="Store not found")
-    if store.user_id != current_user.id:
-        raise HTTPException(status_code=403, detail="Not your store")
-    
+    await remove_store(db, store_id)
     await db.delete(store)
     await db.commit()
+    on_store_changed(store_id)
     return {"message": "Store deleted"}
 
-# Public storefront endpoint (no auth required)
-@router.get("/public/{slug}")
-async def get_public_store(slug: str, db: AsyncSession = Depends(get_db)):
-    """Get public storefront data by slug"""
+MAX_VISITOR_RANGE_DAYS = 366
+
+@router.get("/{store_id}/analytics/visitors")
+async def get_unique_visitors(
+    store_id: int,
+    date_from: date,
+    date_to: date,
+    db: AsyncSession = Depends(get_db),
+    store: Store = Depends(get_owned_store)
+):
+    """Estimated unique visitors over an inclusive date range (UTC days).
+    
+    A visitor seen on several days counts once: the daily sketches are merged,
+    not their counts summed. Events from the last flush interval are not included.
+    """
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="date_to must not be before date_from")
+    if date_to - date_from > timedelta(days=MAX_VISITOR_RANGE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_VISITOR_RANGE_DAYS} days")
+    
     result = await db.execute(
-        select(Store)
-        .options(selectinload(Store.store_products).selectinload(StoreProduct.product))
-        .where(Store.slug == slug, Store.is_active == True)
+        select(VisitorSketch.sketch).where(
+            VisitorSketch.store_id == store_id,
+            VisitorSketch.date >= date_from,
+            VisitorSketch.date <= date_to,
+        )
     )
-    store = result.scalar_one_or_none()
+    sketches = [HyperLogLog.from_bytes(blob) for blob in result.scalars().all()]
+    return {
+        "store_id": store_id,
+        "date_from": date_from,
+        "date_to": date_to,
+        "days_with_visits": len(sketches),
+        "unique_visitors": HyperLogLog.union(sketches).count(),
+    }
+
+# Public storefront endpoints (no auth required)
+STOREFRONT_CACHE_CONTROL = "public, no-cache"
+
+def storefront_response(request: Request, entry: CachedStorefront) -> Response:
+    """Serve cached storefront bytes, gzip when the client accepts it"""
+    if etag_matches(request, entry.etag):
+        return not_modified(entry.etag, cache_control=STOREFRONT_CACHE_CONTROL)
+    headers = {"ETag": entry.etag, "Cache-Control": STOREFRONT_CACHE_CONTROL, "Vary": "Accept-Encoding"}
+    headers.update(entry.headers)
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        headers["Content-Encoding"] = "gzip"
+        return Response(entry.gzip_body, media_type="application/json", headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
+
+async def storefront_version(db: AsyncSession, slug: str):
+    """(store id, versions...) for an active store in one aggregate row, no ORM objects.
     
-    if not store:
+    Store.updated_at is touched whenever the store's product list changes and
+    storefront_items.updated_at whenever a row is rewritten.
+    """
+    result = await db.execute(
+        select(
+            Store.id,
+            Store.updated_at,
+            func.count(StorefrontItem.id),
+            func.max(StorefrontItem.updated_at),
+        )
+        .select_from(Store)
+        .outerjoin(StorefrontItem, StorefrontItem.store_id == Store.id)
+        .where(Store.slug == slug, Store.is_active == True)
+        .group_by(Store.id, Store.updated_at)
+    )
+    version = result.first()
+    if version is None:
         raise HTTPException(status_code=404, detail="Store not found")
+    return version
+
+STOREFRONT_ITEM_FIELDS = (
+    "id", "name", "description", "price", "image_url", "images", "category", "is_featured", "in_stock",
+)
+
+def storefront_items_query(store_id: int):
+    """A store's storefront rows, fallbacks already resolved (see services.storefront_items)"""
+    return (
+        select(*(getattr(StorefrontItem, name) for name in STOREFRONT_ITEM_FIELDS), StorefrontItem.created_at)
+        .where(StorefrontItem.store_id == store_id)
+    )
+
+def storefront_item(row) -> dict:
+    return {name: getattr(row, name) for name in STOREFRONT_ITEM_FIELDS}
+
+@router.get("/public/{slug}")
+async def get_public_store(
+    slug: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get the public storefront header: store settings plus featured products.
     
-    # Format response for public consumption
-    products = []
-    for sp in store.store_products:
-        if sp.is_active and sp.product.is_active:
-            products.append({
-                "id": sp.id,
-                "name": sp.custom_name or sp.product.name,
-                "description": sp.custom_description or sp.product.description,
-                "price": sp.custom_price or sp.product.suggested_retail,
-                "image_url": sp.product.image_url,
-                "images": sp.product.images,
-                "category": sp.product.category,
-                "is_featured": sp.is_featured,
-                "in_stock": sp.product.stock_quantity > 0
-            })
+    The full product list is paginated under /public/{slug}/products.
+    """
+    entry = storefront_cache.get(slug)
+    if entry is not None:
+        return storefront_response(request, entry)
+    generation = storefront_cache.generation
     
-    return {
+    version = await storefront_version(db, slug)
+    etag = make_etag("storefront", *version)
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control=STOREFRONT_CACHE_CONTROL)
+    
+    result = await db.execute(select(Store).where(Store.id == version[0]))
+    store = result.scalar_one()
+    
+    # Featured products: (store_id, is_featured, created_at, id) index range
+    result = await db.execute(
+        storefront_items_query(store.id)
+        .where(StorefrontItem.is_featured == True)
+        .order_by(StorefrontItem.created_at.desc(), StorefrontItem.id.desc())
+        .limit(settings.STOREFRONT_FEATURED_LIMIT)
+    )
+    
+    payload = {
         "id": store.id,
         "name": store.name,
         "slug": store.slug,
@@ -162,5 +253,101 @@ async def get_public_store(slug: str, db: AsyncSession = Depends(get_db)):
         "logo_url": store.logo_url,
         "banner_url": store.banner_url,
         "primary_color": store.primary_color,
-        "products": products
+        "featured": [storefront_item(row) for row in result.all()]
     }
+    
+    entry = storefront_cache.build(slug, store.id, etag, to_json(payload).encode())
+    storefront_cache.put(entry, generation)
+    return storefront_response(request, entry)
+
+@router.get("/public/{slug}/products")
+async def get_public_store_products(
+    slug: str,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    category: Optional[str] = None,
+    in_stock: Optional[bool] = None,
+    featured: Optional[bool] = None,
+    sort: str = Query("featured", regex="^(featured|newest|price_asc|price_desc)$"),
+    limit: int = Query(24, ge=1, le=100),
+    cursor: Optional[str] = None
+):
+    """Paginated, filterable storefront product listing (next page via X-Next-Cursor)"""
+    cache_key = f"{slug}/products?{sorted(request.query_params.multi_items())}"
+    entry = storefront_cache.get(cache_key)
+    if entry is not None:
+        return storefront_response(request, entry)
+    generation = storefront_cache.generation
+    
+    version = await storefront_version(db, slug)
+    etag = make_etag("storefront-products", *version, sorted(request.query_params.multi_items()))
+    if etag_matches(request, etag):
+        return not_modified(etag, cache_control=STOREFRONT_CACHE_CONTROL)
+    store_id = version[0]
+    
+    query = storefront_items_query(store_id)
+    if category:
+        query = query.where(StorefrontItem.category == category)
+    if in_stock:
+        query = query.where(StorefrontItem.in_stock == True)
+    if featured is not None:
+        query = query.where(StorefrontItem.is_featured == featured)
+    
+    columns, descending = {
+        "featured": ([StorefrontItem.is_featured, StorefrontItem.created_at, StorefrontItem.id], True),
+        "newest": ([StorefrontItem.created_at, StorefrontItem.id], True),
+        "price_asc": ([StorefrontItem.price, StorefrontItem.id], False),
+        "price_desc": ([StorefrontItem.price, StorefrontItem.id], True),
+    }[sort]
+    query = keyset_paginate(
+        query,
+        columns,
+        key=f"storefront:{sort}",
+        descending=descending,
+        cursor=cursor,
+        limit=limit,
+    )
+    result = await db.execute(query)
+    
+    def sort_values(row):
+        return {
+            "featured": [row.is_featured, row.created_at, row.id],
+            "newest": [row.created_at, row.id],
+        }.get(sort, [row.price, row.id])
+    
+    rows, next_cursor = page_with_cursor(result.all(), limit, f"storefront:{sort}", sort_values)
+    
+    entry = storefront_cache.build(
+        cache_key, store_id, etag,
+        to_json([storefront_item(row) for row in rows]).encode(),
+        headers={CURSOR_HEADER: next_cursor} if next_cursor else None,
+    )
+    storefront_cache.put(entry, generation)
+    return storefront_response(request, entry)
+
+@router.post("/public/{slug}/events", status_code=202)
+async def record_storefront_events(
+    slug: str,
+    data: StorefrontEvents,
+    db: AsyncSession = Depends(get_db)
+):
+    """Record a batch of storefront events (page/product views, add-to-cart).
+    
+    Counts are buffered in memory and written to the store's daily analytics
+    row on the next flush, not per request.
+    """
+    store_id = storefront_cache.store_id(slug)
+    if store_id is None:
+        generation = storefront_cache.generation
+        result = await db.execute(
+            select(Store.id).where(Store.slug == slug, Store.is_active == True)
+        )
+        store_id = result.scalar_one_or_none()
+        if store_id is None:
+            raise HTTPException(status_code=404, detail="Store not found")
+        storefront_cache.put_store_id(slug, store_id, generation)
+    
+    accepted = analytics_buffer.record(
+        store_id, Counter(event.type for event in data.events), visitor_id=data.visitor_id
+    )
+    return {"accepted": accepted}
@@ -117,6 +117,29 @@ class ProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., max_length=500)
+
+class ProductBatchResponse(BaseModel):
+    products: List[ProductResponse]  # in request order, duplicates removed
+    missing: List[int]
+
+class ProductSyncItem(BaseModel):
+    """Supplier feed delta: omitted fields are left as they are"""
+    sku: str
+    stock_quantity: Optional[int] = Field(None, ge=0)
+    cost_price: Optional[float] = None
+    base_price: Optional[float] = None
+    suggested_retail: Optional[float] = None
+
+class ProductSyncRequest(BaseModel):
+    items: List[ProductSyncItem] = Field(..., max_length=10000)
+
+class ProductSyncResponse(BaseModel):
+    changed: List[int]  # product ids whose values changed
+    unchanged: int
+    missing: List[str]  # unknown SKUs
+
 # Store Product Schemas
 class StoreProductCreate(BaseModel):
     product_id: int
@@ -146,6 +169,48 @@ class StoreProductResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# Order Schemas
+class CheckoutItem(BaseModel):
+    store_product_id: int
+    quantity: int = Field(..., ge=1, le=100)
+
+class OrderCreate(BaseModel):
+    customer_name: str = Field(..., min_length=1)
+    customer_email: EmailStr
+    customer_phone: Optional[str] = None
+    shipping_address: dict = {}
+    notes: Optional[str] = None
+    items: List[CheckoutItem] = Field(..., min_length=1, max_length=50)
+
+class OrderItemResponse(BaseModel):
+    product_id: int
+    quantity: int
+    unit_price: float
+    total_price: float
+    
+    class Config:
+        from_attributes = True
+
+class OrderResponse(BaseModel):
+    id: int
+    store_id: int
+    order_number: str
+    customer_name: str
+    customer_email: str
+    customer_phone: Optional[str] = None
+    shipping_address: Optional[dict] = None
+    notes: Optional[str] = None
+    subtotal: float
+    shipping_cost: float
+    tax: float
+    total_amount: float
+    status: str
+    created_at: datetime
+    items: List[OrderItemResponse]
+    
+    class Config:
+        from_attributes = True
+
 # AI Schemas
 class AIRecommendRequest(BaseModel):
     store_id: Optional[int] = None
@@ -175,3 +240,10 @@ class AnalyticsSummary(BaseModel):
     avg_order_value: float
     top_products: List[dict]
     recent_orders: List[dict]
+
+class StorefrontEvent(BaseModel):
+    type: str = Field(..., pattern="^(page_view|product_view|add_to_cart)$")
+
+class StorefrontEvents(BaseModel):
+    events: List[StorefrontEvent] = Field(..., min_length=1, max_length=50)
+    visitor_id: Optional[str] = Field(None, max_length=128)  # anonymous id kept by the client, for unique visitors
@@ -0,0 +1,3 @@
+from services.search import CatalogSearch, catalog_search
+
+__all__ = ["CatalogSearch", "catalog_search"]
@@ -0,0 +1,280 @@
+"""
+Analytics Buffer for DropSkill AI
+Storefront events are counted in memory per (store_id, day) and written to
+`analytics` every ANALYTICS_FLUSH_SECONDS as one batched upsert, instead of a
+row write per hit. Visitor ids go into a per-key HyperLogLog sketch that is
+merged into `visitor_sketches` and sets the day's `unique_visitors`.
+
+Every recorded event is also appended to a spill file, which its process
+holds an exclusive flock on until a flush has committed its counts and deleted
+it. At startup, files nobody holds a lock on (their process died) are replayed;
+files of live workers are skipped. Replay is at-least-once:
+a crash between commit and delete counts that interval twice (re-adding
+visitors to a sketch is harmless). Memory is
+bounded by ANALYTICS_MAX_KEYS (store, day) pairs; events for new pairs
+beyond that are dropped and counted.
+"""
+import asyncio
+import fcntl
+import os
+import time
+from collections import Counter
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, IO, List, Optional, Tuple
+
+from sqlalchemy import bindparam, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from config import settings
+from database import async_session, engine
+from models.analytics import Analytics, VisitorSketch
+from models.store import Store
+from services.hll import HyperLogLog, hash64
+
+# event type -> Analytics counter column
+EVENT_COUNTERS = {
+    "page_view": "page_views",
+    "product_view": "products_viewed",
+    "add_to_cart": "products_added_to_cart",
+}
+
+Key = Tuple[int, date]
+
+
+class AnalyticsBuffer:
+    def __init__(self, flush_seconds: float, max_keys: int, spill_dir: str):
+        self.flush_seconds = flush_seconds
+        self.max_keys = max_keys
+        self.spill_dir = Path(spill_dir)
+        self.recorded = 0
+        self.dropped = 0
+        self.flushed_rows = 0
+        self.last_flush_ms = 0.0
+        self._counts: Dict[Key, Counter] = {}
+        self._sketches: Dict[Key, HyperLogLog] = {}  # only for keys that saw a visitor id
+        self._spill: Optional[Tuple[Path, IO]] = None  # file being appended to
+        self._pending_files: List[Tuple[Path, IO]] = []  # locked spill files not yet committed
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    # ---------------- Recording ----------------
+
+    def record(self, store_id: int, events: Dict[str, int], visitor_id: Optional[str] = None) -> int:
+        """Count events (type -> n) for a store today. Returns how many were accepted."""
+        key = (store_id, datetime.utcnow().date())
+        counts = self._counts.get(key)
+        if counts is None:
+            if len(self._counts) >= self.max_keys:
+                self.dropped += sum(events.values())
+                return 0
+            counts = self._counts[key] = Counter()
+
+        lines = []
+        for event, n in events.items():
+            column = EVENT_COUNTERS[event]
+            counts[column] += n
+            lines.append(f"{store_id},{key[1].isoformat()},{column},{n}\n")
+        if visitor_id:
+            visitor = hash64(visitor_id)
+            self._sketches.setdefault(key, HyperLogLog()).add_hash(visitor)
+            lines.append(f"{store_id},{key[1].isoformat()},visitor,{visitor}\n")
+        spill = self._spill_file()
+        spill.writelines(lines)
+        spill.flush()  # survives a process crash once handed to the OS
+
+        accepted = sum(events.values())
+        self.recorded += accepted
+        return accepted
+
+    def _spill_file(self) -> IO:
+        if self._spill is None:
+            self.spill_dir.mkdir(parents=True, exist_ok=True)
+            path = self.spill_dir / f"events-{os.getpid()}-{time.time_ns()}.log"
+            f = open(path, "a")
+            # Held until the file is deleted: marks it as owned by a live process
+            fcntl.flock(f, fcntl.LOCK_EX)
+            self._spill = (path, f)
+        return self._spill[1]
+
+    @staticmethod
+    def _release(files: List[Tuple[Path, IO]]) -> None:
+        # Delete before unlocking, so no other process can claim committed events
+        for path, f in files:
+            path.unlink(missing_ok=True)
+            f.close()
+
+    # ---------------- Flushing ----------------
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            counts, self._counts = self._counts, {}
+            sketches, self._sketches = self._sketches, {}
+            if self._spill is not None:
+                # Later events go to a new file; this one is kept (and locked) until committed
+                self._spill[1].flush()
+                self._pending_files.append(self._spill)
+                self._spill = None
+            if not counts:
+                self._release(self._pending_files)
+                self._pending_files = []
+                return
+
+            started = time.perf_counter()
+            try:
+                await self._upsert(counts, sketches)
+            except BaseException as e:
+                # Keep the counts (and their spill files) for the next attempt,
+                # also when cancelled mid-flush at shutdown
+                for key, counter in counts.items():
+                    self._counts.setdefault(key, Counter()).update(counter)
+                for key, sketch in sketches.items():
+                    self._sketches.setdefault(key, HyperLogLog()).merge(sketch)
+                if not isinstance(e, Exception):
+                    raise
+                print(f"⚠️  Analytics flush failed, will retry: {e}")
+                return
+            self.last_flush_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.flushed_rows += len(counts)
+
+            self._release(self._pending_files)
+            self._pending_files = []
+
+    @classmethod
+    async def _upsert(cls, counts: Dict[Key, Counter], sketches: Dict[Key, HyperLogLog]) -> None:
+        async with async_session() as db:
+            # Stores may have been deleted since the events arrived
+            result = await db.execute(select(Store.id).where(Store.id.in_({store_id for store_id, _ in counts})))
+            live = set(result.scalars().all())
+            columns = list(EVENT_COUNTERS.values())
+            rows = [
+                {"store_id": store_id, "date": day, **{c: counter.get(c, 0) for c in columns}}
+                for (store_id, day), counter in counts.items()
+                if store_id in live
+            ]
+            if not rows:
+                return
+
+            insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+            stmt = insert(Analytics)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Analytics.store_id, Analytics.date],
+                set_={c: getattr(Analytics, c) + stmt.excluded[c] for c in columns},
+            )
+            await db.execute(stmt, rows)
+            await cls._merge_sketches(db, {key: sketch for key, sketch in sketches.items() if key[0] in live})
+            await db.commit()
+
+    @staticmethod
+    async def _merge_sketches(db, sketches: Dict[Key, HyperLogLog]) -> None:
+        """Union buffered sketches into the stored ones and refresh unique_visitors"""
+        if not sketches:
+            return
+        keys = sorted(sketches)
+        insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+        await db.execute(
+            insert(VisitorSketch).on_conflict_do_nothing(index_elements=[VisitorSketch.store_id, VisitorSketch.date]),
+            [{"store_id": store_id, "date": day, "sketch": HyperLogLog().to_bytes()} for store_id, day in keys],
+        )
+        # Rows locked in key order: read-merge-write must not race another worker's flush
+        result = await db.execute(
+            select(VisitorSketch.id, VisitorSketch.store_id, VisitorSketch.date, VisitorSketch.sketch)
+            .where(tuple_(VisitorSketch.store_id, VisitorSketch.date).in_(keys))
+            .order_by(VisitorSketch.store_id, VisitorSketch.date)
+            .with_for_update()
+        )
+        now = datetime.utcnow()
+        merged, uniques = [], []
+        for row in result.all():
+            sketch = HyperLogLog.from_bytes(row.sketch).merge(sketches[(row.store_id, row.date)])
+            merged.append({"id": row.id, "sketch": sketch.to_bytes(), "updated_at": now})
+            uniques.append({"b_store_id": row.store_id, "b_date": row.date, "b_uniques": sketch.count()})
+        await db.execute(update(VisitorSketch), merged)
+
+        analytics = Analytics.__table__
+        await db.execute(
+            update(analytics)
+            .where(analytics.c.store_id == bindparam("b_store_id"), analytics.c.date == bindparam("b_date"))
+            .values(unique_visitors=bindparam("b_uniques")),
+            uniques,
+        )
+
+    # ---------------- Lifecycle ----------------
+
+    async def replay_spill_files(self) -> int:
+        """Load spill files left by crashed processes. Returns the number of events replayed."""
+        if not self.spill_dir.exists():
+            return 0
+        replayed = 0
+        for path in sorted(self.spill_dir.glob("events-*.log")):
+            f = self._claim(path)
+            if f is None:
+                continue
+            for line in f:
+                try:
+                    store_id, day, column, n = line.rstrip("\n").split(",")
+                    key = (int(store_id), date.fromisoformat(day))
+                    counts = self._counts.setdefault(key, Counter())
+                    if column == "visitor":
+                        self._sketches.setdefault(key, HyperLogLog()).add_hash(int(n))
+                    else:
+                        counts[column] += int(n)
+                        replayed += int(n)
+                except ValueError:
+                    continue  # torn last line of a crashed write
+            self._pending_files.append((path, f))
+        return replayed
+
+    @staticmethod
+    def _claim(path: Path) -> Optional[IO]:
+        """Open and lock a spill file whose owner is gone; None if a live process holds it"""
+        try:
+            f = open(path)
+        except FileNotFoundError:
+            return None  # flushed by its owner meanwhile
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            # The owner may have committed and deleted it between our open and lock
+            if os.fstat(f.fileno()).st_ino != os.stat(path).st_ino:
+                raise FileNotFoundError(path)
+        except OSError:
+            f.close()
+            return None
+        return f
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_seconds)
+            try:
+                await self.flush()
+            except Exception as e:
+                # Keep flushing: the counts are still buffered or spilled
+                print(f"⚠️  Analytics flush failed: {e}")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+    def metrics(self) -> Dict:
+        return {
+            "keys": len(self._counts),
+            "sketches": len(self._sketches),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "flushed_rows": self.flushed_rows,
+            "last_flush_ms": self.last_flush_ms,
+            "pending_spill_files": len(self._pending_files),
+        }
+
+
+analytics_buffer = AnalyticsBuffer(
+    flush_seconds=settings.ANALYTICS_FLUSH_SECONDS,
+    max_keys=settings.ANALYTICS_MAX_KEYS,
+    spill_dir=settings.ANALYTICS_SPILL_DIR,
+)
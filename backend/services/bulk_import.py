@@ -0,0 +1,173 @@
+"""
+Bulk Product Import for DropSkill AI
+Streams CSV/NDJSON supplier feeds into the catalog in batches: rows are
+validated with ProductCreate, each batch resolves its SKUs with one IN query
+and is written with a single INSERT ... ON CONFLICT (sku) DO UPDATE, then
+committed, so memory stays flat and progress survives a failed feed.
+"""
+import codecs
+import csv
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, FrozenSet, List, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from database import engine
+from models.product import Product
+from schemas import ProductCreate
+from services.counters import adjust
+from services.invalidation import on_products_changed
+from services.low_stock import stock_levels, crossings, low_stock_alerts
+from services.storefront_items import sync_products
+
+IMPORT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 100
+JSON_FIELDS = ("images", "specifications", "tags")  # JSON-encoded in CSV feeds, as exported
+
+
+async def upsert_products(db: AsyncSession, rows: List[Dict]) -> Tuple[int, List[int]]:
+    """Insert or update products by SKU: (number inserted, ids of updated products).
+
+    Rows must have unique SKUs. On conflict only the columns a row carries
+    are overwritten, so a partial row (e.g. just a new price) leaves stock,
+    description and the rest of the product alone, and re-importing a feed
+    does not reactivate products or reset their AI metrics.
+    """
+    if not rows:
+        return 0, []
+    result = await db.execute(
+        select(Product.sku, Product.id).where(Product.sku.in_([row["sku"] for row in rows]))
+    )
+    existing = dict(result.all())
+
+    # executemany needs every row to carry the same keys: one statement per key
+    # set, so a column a row did not send is never part of its update
+    groups: Dict[FrozenSet[str], List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+
+    insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    now = datetime.utcnow()
+    for keys, values in groups.items():
+        stmt = insert(Product)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[Product.sku],
+            set_={
+                **{name: stmt.excluded[name] for name in keys - {"id", "sku", "created_at"}},
+                "updated_at": now,
+            },
+        )
+        await db.execute(stmt, values)
+    return len(rows) - len(existing), list(existing.values())
+
+
+async def _lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    decoder = codecs.getincrementaldecoder("utf-8")()  # chunks may split a character
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def _ndjson_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    number = 0
+    async for line in _lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield number, row if isinstance(row, dict) else {"__error__": "Invalid JSON object"}
+
+
+async def _csv_rows(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Dict]]:
+    header = None
+    number = 0
+    record = ""
+    async for line in _lines(chunks):
+        # A newline inside a quoted field continues the record
+        record += line + "\n"
+        if record.count('"') % 2:
+            continue
+        fields, record = next(csv.reader([record.rstrip("\r\n")]), []), ""
+        if header is None:
+            header = fields
+            continue
+        number += 1
+        if not any(fields):
+            continue
+        row = {name: value for name, value in zip(header, fields) if value != ""}
+        for name in JSON_FIELDS:
+            if name in row:
+                try:
+                    row[name] = json.loads(row[name])
+                except ValueError:
+                    row = {"__error__": f"{name}: invalid JSON", "sku": row.get("sku")}
+                    break
+        yield number, row
+
+
+async def import_feed(db: AsyncSession, chunks: AsyncIterator[bytes], format: str) -> Dict:
+    """Validate and upsert a streamed feed; returns counts, per-row errors and throughput"""
+    started = time.perf_counter()
+    report = {"rows": 0, "inserted": 0, "updated": 0, "duplicates": 0, "failed": 0, "errors": []}
+    batch: Dict[str, Dict] = {}  # sku -> row; a later duplicate's fields win
+
+    def fail(number: int, sku, messages: List[str]) -> None:
+        report["failed"] += 1
+        if len(report["errors"]) < MAX_REPORTED_ERRORS:
+            report["errors"].append({"row": number, "sku": sku, "errors": messages})
+
+    async def flush() -> None:
+        in_batch = Product.sku.in_(list(batch))
+        before = await stock_levels(db, in_batch)
+        inserted, updated_ids = await upsert_products(db, list(batch.values()))
+        await sync_products(db, updated_ids)
+        await adjust(db, products=inserted)
+        after = await stock_levels(db, in_batch)
+        await db.commit()
+        await on_products_changed(db, updated_ids)
+        low_stock_alerts.publish(crossings(before, after.values()))
+        report["inserted"] += inserted
+        report["updated"] += len(updated_ids)
+        batch.clear()
+
+    rows = _csv_rows(chunks) if format == "csv" else _ndjson_rows(chunks)
+    async for number, raw in rows:
+        report["rows"] += 1
+        if "__error__" in raw:
+            fail(number, raw.get("sku"), [raw["__error__"]])
+            continue
+        try:
+            product = ProductCreate.model_validate(raw)
+        except ValidationError as e:
+            fail(number, raw.get("sku"), [
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            ])
+            continue
+        if product.sku in batch:
+            report["duplicates"] += 1
+        # Only the fields the feed sent: defaults must not overwrite existing data
+        batch[product.sku] = {**batch.get(product.sku, {}), **product.model_dump(exclude_unset=True)}
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["rows_per_second"] = round(report["rows"] / elapsed) if elapsed else report["rows"]
+    return report
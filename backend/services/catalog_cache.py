@@ -0,0 +1,323 @@
+"""
+Catalog Cache for DropSkill AI
+Versioned, immutable in-memory snapshot of the supplier catalog.
+
+The catalog only changes through admin writes, so reads are served from a
+snapshot indexed by id, category and sort key. Writes in this process call
+invalidate(); every process also refreshes incrementally (rows whose
+updated_at moved) once the snapshot is older than the configured TTL, which
+bounds staleness across workers.
+
+Refreshes run in the background: the next snapshot is built in a worker
+thread and swapped in whole, while requests keep reading the current one.
+"""
+import asyncio
+import hashlib
+import time
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass, replace
+from functools import reduce
+from operator import xor
+from datetime import datetime, timedelta
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select, func
+
+from config import settings
+from database import async_session
+from models.product import Product
+from schemas import ProductResponse
+
+SORT_KEYS = ("name", "base_price", "demand_score", "created_at")
+
+# Rows written by another worker can carry a slightly older updated_at than
+# our high-water mark (clock skew, long transactions); re-read this window.
+REFRESH_OVERLAP = timedelta(seconds=5)
+
+SortIndex = List[Tuple[Any, int]]  # never mutated once in a snapshot
+
+
+def _row_hash(product_id: int, updated_at: Optional[datetime]) -> int:
+    key = f"{product_id}:{updated_at.isoformat() if updated_at else ''}"
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def _sort_index(products: Iterable[ProductResponse], key: str) -> SortIndex:
+    return sorted((getattr(p, key), p.id) for p in products)
+
+
+def _patch_index(old: SortIndex, removed: List[Tuple[Any, int]], added: List[Tuple[Any, int]]) -> SortIndex:
+    """`old` without `removed` and with `added`, each key placed by binary search"""
+    if (len(removed) + len(added)) * 64 > len(old):
+        # Large change set: one merge sort beats many list shifts
+        gone = set(removed)
+        return sorted([k for k in old if k not in gone] + added)
+    keys = old.copy()
+    for key in removed:
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            del keys[i]
+    for key in added:
+        insort(keys, key)
+    return keys
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    version: int
+    built_at: float
+    high_water: Optional[datetime]
+    products: Mapping[int, ProductResponse]  # every product, including inactive
+    row_versions: Mapping[int, Optional[datetime]]  # products.updated_at, for ETags
+    # XOR of (id, updated_at) hashes: the same in every process holding the same rows
+    fingerprint: int
+    categories: Tuple[str, ...]  # categories with at least one active product
+    by_sort: Mapping[str, SortIndex]  # active products, ascending (value, id)
+    by_category: Mapping[str, Mapping[str, SortIndex]]
+
+    def get(self, product_id: int) -> Optional[ProductResponse]:
+        return self.products.get(product_id)
+
+    def browse(
+        self,
+        sort_by: str,
+        descending: bool,
+        limit: int,
+        after: Optional[Tuple[Any, int]] = None,
+        offset: int = 0,
+        category: Optional[str] = None,
+        subcategory: Optional[str] = None,
+        tag: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: Optional[bool] = None,
+    ) -> List[ProductResponse]:
+        """Active products in (sort_by, id) order, seeking past `after` like keyset SQL"""
+        if category:
+            keys = self.by_category.get(category, {}).get(sort_by, [])
+        else:
+            keys = self.by_sort[sort_by]
+
+        if descending:
+            end = bisect_left(keys, after) if after else len(keys)
+            positions = range(end - 1, -1, -1)
+        else:
+            start = bisect_right(keys, after) if after else 0
+            positions = range(start, len(keys))
+
+        page = []
+        for i in positions:
+            product = self.products[keys[i][1]]
+            if subcategory and product.subcategory != subcategory:
+                continue
+            if tag and tag not in (product.tags or []):
+                continue
+            if min_price and product.suggested_retail < min_price:
+                continue
+            if max_price and product.suggested_retail > max_price:
+                continue
+            if in_stock and product.stock_quantity <= 0:
+                continue
+            if offset:
+                offset -= 1
+                continue
+            page.append(product)
+            if len(page) >= limit:
+                break
+        return page
+
+    def trending(self, limit: int) -> List[ProductResponse]:
+        return self.browse("demand_score", descending=True, limit=limit)
+
+    @classmethod
+    def build(
+        cls,
+        version: int,
+        products: Dict[int, ProductResponse],
+        row_versions: Dict[int, Optional[datetime]],
+    ) -> "CatalogSnapshot":
+        """Full build from every product row"""
+        active = [p for p in products.values() if p.is_active]
+        grouped: Dict[str, List[ProductResponse]] = {}
+        for p in active:
+            grouped.setdefault(p.category, []).append(p)
+
+        return cls(
+            version=version,
+            built_at=time.monotonic(),
+            high_water=max(filter(None, row_versions.values()), default=None),
+            products=MappingProxyType(products),
+            row_versions=MappingProxyType(row_versions),
+            fingerprint=reduce(xor, (_row_hash(pid, v) for pid, v in row_versions.items()), 0),
+            categories=tuple(sorted(grouped)),
+            by_sort=MappingProxyType({key: _sort_index(active, key) for key in SORT_KEYS}),
+            by_category=MappingProxyType({
+                category: MappingProxyType({key: _sort_index(items, key) for key in SORT_KEYS})
+                for category, items in grouped.items()
+            }),
+        )
+
+    def apply(
+        self,
+        version: int,
+        changed: Dict[int, ProductResponse],
+        changed_versions: Dict[int, Optional[datetime]],
+    ) -> "CatalogSnapshot":
+        """Incremental build: a new snapshot with `changed` rows replaced or added.
+
+        Only the changed rows' keys move: each is removed from and re-inserted
+        into the global indexes and those of the categories it left or joined.
+        CPU-bound for large catalogs; CatalogCache runs it off the event loop.
+        """
+        # .copy() of the proxied dicts is a C-level copy, unlike dict(proxy)
+        products = self.products.copy()
+        products.update(changed)
+        row_versions = self.row_versions.copy()
+        row_versions.update(changed_versions)
+
+        fingerprint = self.fingerprint
+        for pid, updated_at in changed_versions.items():
+            if pid in self.row_versions:
+                fingerprint ^= _row_hash(pid, self.row_versions[pid])
+            fingerprint ^= _row_hash(pid, updated_at)
+
+        # Active rows leaving and entering the indexes, overall and per category
+        leaving = [self.products[pid] for pid in changed if pid in self.products and self.products[pid].is_active]
+        entering = [p for p in changed.values() if p.is_active]
+
+        def patch(old: SortIndex, key: str, category: Optional[str] = None) -> SortIndex:
+            def keys(rows):
+                return [(getattr(p, key), p.id) for p in rows if category is None or p.category == category]
+            return _patch_index(old, keys(leaving), keys(entering))
+
+        by_category = dict(self.by_category)
+        for category in {p.category for p in leaving} | {p.category for p in entering}:
+            old = self.by_category.get(category, {})
+            index = {key: patch(old.get(key, []), key, category) for key in SORT_KEYS}
+            if index[SORT_KEYS[0]]:
+                by_category[category] = MappingProxyType(index)
+            else:
+                by_category.pop(category, None)
+
+        return replace(
+            self,
+            version=version,
+            built_at=time.monotonic(),
+            high_water=max(filter(None, [self.high_water, *changed_versions.values()]), default=None),
+            products=MappingProxyType(products),
+            row_versions=MappingProxyType(row_versions),
+            fingerprint=fingerprint,
+            categories=tuple(sorted(by_category)),
+            by_sort=MappingProxyType({key: patch(self.by_sort[key], key) for key in SORT_KEYS}),
+            by_category=MappingProxyType(by_category),
+        )
+
+
+class CatalogCache:
+    def __init__(self, ttl_seconds: float, max_products: int, enabled: bool = True):
+        self.ttl_seconds = ttl_seconds
+        self.max_products = max_products
+        self.enabled = enabled
+        self.version = 0
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._dirty = False
+        self._over_budget_until = 0.0
+        self._lock = asyncio.Lock()
+        self._refreshing: Optional[asyncio.Task] = None
+
+    def invalidate(self) -> None:
+        """Called after catalog writes: bump the version, refresh on the next read"""
+        self.version += 1
+        self._dirty = True
+
+    def _is_fresh(self) -> bool:
+        snapshot = self._snapshot
+        return (
+            snapshot is not None
+            and not self._dirty
+            and time.monotonic() - snapshot.built_at < self.ttl_seconds
+        )
+
+    async def snapshot(self) -> Optional[CatalogSnapshot]:
+        """Current snapshot, or None when caching is off or the catalog exceeds the budget.
+
+        A stale snapshot is still returned while its replacement is built in the
+        background; only the very first build is waited for.
+        """
+        if not self.enabled or time.monotonic() < self._over_budget_until:
+            return None
+        snapshot = self._snapshot
+        if snapshot is None:
+            async with self._lock:
+                if self._snapshot is None:
+                    await self._refresh()
+            return self._snapshot
+        if not self._is_fresh() and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self._refresh_in_background())
+        return snapshot
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            async with self._lock:
+                await self._refresh()
+        except Exception as e:
+            # Keep serving the current snapshot; the next read retries
+            self._dirty = True
+            print(f"⚠️  Catalog snapshot refresh failed: {e}")
+
+    async def _refresh(self) -> None:
+        self._dirty = False
+        previous = self._snapshot
+
+        async with async_session() as db:
+            query = select(Product)
+            if previous is None:
+                count = (await db.execute(select(func.count(Product.id)))).scalar() or 0
+                if count > self.max_products:
+                    self._disable_for_ttl()
+                    return
+            elif previous.high_water is not None:
+                query = query.where(Product.updated_at >= previous.high_water - REFRESH_OVERLAP)
+
+            result = await db.execute(query)
+            orm_rows = result.scalars().all()
+
+        # Validation, diffing and index maintenance are CPU-bound: off the event loop
+        self.version += 1
+        snapshot = await asyncio.to_thread(self._next_snapshot, previous, orm_rows, self.version)
+        if snapshot is None:
+            self._disable_for_ttl()
+        else:
+            self._snapshot = snapshot
+
+    def _next_snapshot(
+        self, previous: Optional[CatalogSnapshot], orm_rows: List[Product], version: int
+    ) -> Optional[CatalogSnapshot]:
+        """The snapshot after loading `orm_rows`; None when it would exceed the budget"""
+        rows = {p.id: ProductResponse.model_validate(p) for p in orm_rows}
+        versions = {p.id: p.updated_at for p in orm_rows}
+        if previous is None:
+            return CatalogSnapshot.build(version, rows, versions)
+
+        changed = {
+            pid: p for pid, p in rows.items()
+            if previous.products.get(pid) != p or previous.row_versions.get(pid) != versions[pid]
+        }
+        if not changed:
+            return replace(previous, built_at=time.monotonic())
+        if len(previous.products) + len(changed) > self.max_products:
+            return None
+        return previous.apply(version, changed, {pid: versions[pid] for pid in changed})
+
+    def _disable_for_ttl(self) -> None:
+        # Over the memory budget: serve from the database and re-check later
+        self._snapshot = None
+        self._over_budget_until = time.monotonic() + self.ttl_seconds
+
+
+catalog_cache = CatalogCache(
+    ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS,
+    max_products=settings.CATALOG_CACHE_MAX_PRODUCTS,
+    enabled=settings.CATALOG_CACHE_ENABLED,
+)
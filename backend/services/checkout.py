@@ -0,0 +1,109 @@
+"""
+Checkout for DropSkill AI
+Order placement that cannot oversell: every line decrements stock with a
+conditional UPDATE ... WHERE stock_quantity >= :qty inside the order's
+transaction, so concurrent checkouts only contend on the product rows they
+buy (row locks, taken in product id order to avoid deadlocks) and a line
+that finds too little stock rolls the whole order back.
+"""
+from dataclasses import replace
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.order import Order, OrderItem
+from models.product import Product
+from models.storefront import StorefrontItem
+from schemas import OrderCreate
+from services.low_stock import crossings, stock_levels
+from services.order_numbers import WorkerIdUnavailable, order_numbers
+from services.storefront_items import sync_products
+
+
+async def place_order(db: AsyncSession, store_id: int, data: OrderCreate) -> Tuple[Order, List[Dict], Dict]:
+    """Create an order (not committed).
+
+    Returns the order, its item rows and side effects to apply after commit:
+    {"alerts": low-stock crossings, "sold_out": product ids this order sold out}.
+    """
+    # Prices come from the storefront read model: seller overrides already resolved
+    wanted = {}
+    for item in data.items:
+        wanted[item.store_product_id] = wanted.get(item.store_product_id, 0) + item.quantity
+    result = await db.execute(
+        select(StorefrontItem.id, StorefrontItem.product_id, StorefrontItem.name, StorefrontItem.price)
+        .where(StorefrontItem.store_id == store_id, StorefrontItem.id.in_(list(wanted)))
+    )
+    listed = {row.id: row for row in result.all()}
+    unavailable = [sp_id for sp_id in wanted if sp_id not in listed]
+    if unavailable:
+        raise HTTPException(status_code=400, detail=f"Products not available: {unavailable}")
+
+    per_product: Dict[int, int] = {}
+    names = {}
+    for sp_id, quantity in wanted.items():
+        row = listed[sp_id]
+        per_product[row.product_id] = per_product.get(row.product_id, 0) + quantity
+        names[row.product_id] = row.name
+
+    # Before any row locks: without a confirmed worker id no order can be placed
+    try:
+        order_number = order_numbers.next()
+    except WorkerIdUnavailable as e:
+        print(f"⚠️  {e}")
+        raise HTTPException(status_code=503, detail="Checkout temporarily unavailable, please retry")
+
+    # Conditional decrements in product id order: consistent lock order across checkouts
+    now = datetime.utcnow()
+    for product_id in sorted(per_product):
+        quantity = per_product[product_id]
+        result = await db.execute(
+            update(Product)
+            .where(
+                Product.id == product_id,
+                Product.is_active == True,
+                Product.stock_quantity >= quantity,
+            )
+            .values(stock_quantity=Product.stock_quantity - quantity, updated_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount != 1:
+            raise HTTPException(status_code=409, detail=f"Insufficient stock for {names[product_id]}")
+
+    items = [
+        {
+            "product_id": listed[sp_id].product_id,
+            "quantity": quantity,
+            "unit_price": listed[sp_id].price,
+            "total_price": round(listed[sp_id].price * quantity, 2),
+        }
+        for sp_id, quantity in wanted.items()
+    ]
+    subtotal = round(sum(item["total_price"] for item in items), 2)
+    order = Order(
+        store_id=store_id,
+        order_number=order_number,
+        customer_name=data.customer_name,
+        customer_email=data.customer_email,
+        customer_phone=data.customer_phone,
+        shipping_address=data.shipping_address,
+        notes=data.notes,
+        subtotal=subtotal,
+        shipping_cost=0,
+        tax=0,
+        total_amount=subtotal,
+    )
+    db.add(order)
+    await db.flush()
+    await db.execute(insert(OrderItem), [{"order_id": order.id, **item} for item in items])
+
+    after = await stock_levels(db, Product.id.in_(list(per_product)))
+    before = {pid: replace(level, stock=level.stock + per_product[pid]) for pid, level in after.items()}
+    sold_out = [pid for pid, level in after.items() if level.stock <= 0]
+    if sold_out:
+        # Storefronts show in_stock; only a sell-out changes the read model
+        await sync_products(db, sold_out)
+    return order, items, {"alerts": crossings(before, after.values()), "sold_out": sold_out}
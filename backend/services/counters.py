@@ -0,0 +1,124 @@
+"""
+Platform Counters for DropSkill AI
+Totals for the admin dashboard (users, stores, active products, orders,
+revenue) kept in platform_counter_shards instead of COUNT/SUM scans.
+
+ORM writes are counted by an after_flush hook that adds the deltas to one
+randomly chosen shard row per counter on the flushing connection, so counters
+commit or roll back with the rows they describe and concurrent checkouts
+rarely wait on each other's row locks. Reads sum the shards. Core bulk
+statements bypass the ORM and must call adjust() themselves.
+"""
+import random
+from collections import defaultdict
+from datetime import datetime
+from typing import Callable, Dict
+
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from database import engine
+from models.counter import PlatformCounter
+from models.order import Order
+from models.product import Product
+from models.store import Store
+from models.user import User
+
+# counter -> (model, contribution of one row given an attribute getter)
+COUNTERS: Dict[str, tuple] = {
+    "users": (User, lambda get: 1),
+    "stores": (Store, lambda get: 1),
+    "products": (Product, lambda get: 1 if get("is_active") else 0),
+    "orders": (Order, lambda get: 1),
+    "revenue": (Order, lambda get: get("total_amount") or 0),
+}
+
+SHARDS = 16  # rows per counter; concurrent writers collide on 1/SHARDS of flushes
+
+
+def _getter(obj, previous: bool) -> Callable[[str], object]:
+    """Attribute values of `obj`, before this flush's changes if `previous`"""
+    state = inspect(obj)
+
+    def get(attr: str):
+        if previous:
+            history = state.attrs[attr].history
+            if history.deleted:
+                return history.deleted[0]
+        return getattr(obj, attr)
+
+    return get
+
+
+@event.listens_for(Session, "after_flush")
+def _count_flushed_rows(session: Session, flush_context) -> None:
+    deltas: Dict[str, float] = defaultdict(float)
+    for name, (model, weight) in COUNTERS.items():
+        for obj in session.new:
+            if isinstance(obj, model):
+                deltas[name] += weight(_getter(obj, previous=False))
+        for obj in session.deleted:
+            if isinstance(obj, model):
+                deltas[name] -= weight(_getter(obj, previous=True))
+        for obj in session.dirty:
+            if isinstance(obj, model) and session.is_modified(obj):
+                deltas[name] += weight(_getter(obj, previous=False)) - weight(_getter(obj, previous=True))
+
+    if any(deltas.values()):
+        session.connection().execute(*_increment(deltas))
+
+
+def _increment(deltas: Dict[str, float]):
+    """Upsert adding each delta to the same random shard of its counter"""
+    shard = random.randrange(SHARDS)
+    insert = pg_insert if engine.dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(PlatformCounter)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[PlatformCounter.name, PlatformCounter.shard],
+        set_={"value": PlatformCounter.value + stmt.excluded.value, "updated_at": datetime.utcnow()},
+    )
+    # Sorted names: writers hitting the same shard lock its rows in one order
+    rows = [{"name": name, "shard": shard, "value": delta} for name, delta in sorted(deltas.items()) if delta]
+    return stmt, rows
+
+
+async def adjust(db: AsyncSession, **deltas: float) -> None:
+    """Apply deltas for writes made with Core statements (bulk insert/update)"""
+    if any(deltas.values()):
+        await db.execute(*_increment(deltas))
+
+
+async def read_counters(db: AsyncSession) -> Dict[str, float]:
+    result = await db.execute(
+        select(PlatformCounter.name, func.sum(PlatformCounter.value)).group_by(PlatformCounter.name)
+    )
+    return dict(result.all())
+
+
+async def recount(db: AsyncSession) -> Dict[str, float]:
+    """Exact totals computed from the tables, in one statement"""
+    result = await db.execute(
+        select(
+            select(func.count(User.id)).scalar_subquery().label("users"),
+            select(func.count(Store.id)).scalar_subquery().label("stores"),
+            select(func.count(Product.id)).where(Product.is_active == True).scalar_subquery().label("products"),
+            select(func.count(Order.id)).scalar_subquery().label("orders"),
+            select(func.coalesce(func.sum(Order.total_amount), 0)).scalar_subquery().label("revenue"),
+        )
+    )
+    return dict(result.one()._mapping)
+
+
+async def backfill(db: AsyncSession) -> bool:
+    """Seed the counters from the tables when rows are missing. Returns True if it ran."""
+    existing = await read_counters(db)
+    if set(COUNTERS) <= existing.keys():
+        return False
+    totals = await recount(db)
+    for name, value in totals.items():
+        if name not in existing:
+            db.add(PlatformCounter(name=name, value=value))
+    return True
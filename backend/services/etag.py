@@ -0,0 +1,35 @@
+"""
+Conditional GET helpers for DropSkill AI
+Strong ETags derived from row versions or the catalog version, checked before any response is built
+"""
+import hashlib
+from typing import Any
+
+from fastapi import Request, Response
+
+
+def make_etag(*parts: Any) -> str:
+    """Strong ETag over the parts that determine a response body"""
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 requires for this header)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in header.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def not_modified(etag: str, cache_control: str = "private, no-cache") -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+
+
+def set_etag(response: Response, etag: str, cache_control: str = "private, no-cache") -> None:
+    # no-cache: clients may store the body but must revalidate, which is the cheap 304 path
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
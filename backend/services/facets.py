@@ -0,0 +1,243 @@
+"""
+Catalog Facets for DropSkill AI
+Precomputed postings (facet value -> product ids), kept apart from the catalog
+snapshot: they are built from a narrow projection of the products, so they stay
+in memory and are maintained incrementally even for catalogs too large for the
+full snapshot.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Dict, FrozenSet, Iterable, List, Mapping, Optional, Set, Tuple
+
+from sqlalchemy import cast, exists, func, select
+from sqlalchemy.dialects.postgresql import JSONB
+
+from config import settings
+from database import async_session, engine
+from models.product import Product
+from services.catalog_cache import REFRESH_OVERLAP
+
+FACETS = ("category", "subcategory", "price", "in_stock", "tag")
+
+# (label, lower bound inclusive, upper bound exclusive) on suggested_retail
+PRICE_BUCKETS = (
+    ("0-10", 0, 10),
+    ("10-25", 10, 25),
+    ("25-50", 25, 50),
+    ("50-100", 50, 100),
+    ("100+", 100, None),
+)
+
+
+def price_bucket(price: float) -> str:
+    for label, low, high in PRICE_BUCKETS:
+        if price >= low and (high is None or price < high):
+            return label
+    return PRICE_BUCKETS[0][0]
+
+
+def facet_values(product) -> Dict[str, List[str]]:
+    """Facet values a product contributes to"""
+    return {
+        "category": [product.category],
+        "subcategory": [product.subcategory] if product.subcategory else [],
+        "price": [price_bucket(product.suggested_retail)],
+        "in_stock": ["true" if product.stock_quantity > 0 else "false"],
+        "tag": list(dict.fromkeys(product.tags or [])),
+    }
+
+
+def tag_condition(tag: str):
+    """SQL condition: product tags (a JSON array) contain `tag`"""
+    if engine.dialect.name == "postgresql":
+        return cast(Product.tags, JSONB).contains([tag])
+    each = func.json_each(Product.tags).table_valued("value")
+    return exists(select(each.c.value).where(each.c.value == tag))
+
+
+@dataclass(frozen=True)
+class FacetIndex:
+    postings: Mapping[str, Mapping[str, FrozenSet[int]]]
+    active_ids: FrozenSet[int]
+
+    @classmethod
+    def build(cls, products: Iterable) -> "FacetIndex":
+        postings: Dict[str, Dict[str, Set[int]]] = {facet: {} for facet in FACETS}
+        active_ids = set()
+        for p in products:
+            if not p.is_active:
+                continue
+            active_ids.add(p.id)
+            for facet, values in facet_values(p).items():
+                for value in values:
+                    postings[facet].setdefault(value, set()).add(p.id)
+
+        return cls(
+            postings=MappingProxyType({
+                facet: MappingProxyType({v: frozenset(ids) for v, ids in values.items()})
+                for facet, values in postings.items()
+            }),
+            active_ids=frozenset(active_ids),
+        )
+
+    def apply(self, previous: Mapping, changed: Mapping) -> "FacetIndex":
+        """New index with `changed` products (id -> product) moved to their current values"""
+        removed: Dict[str, Dict[str, Set[int]]] = {facet: {} for facet in FACETS}
+        added: Dict[str, Dict[str, Set[int]]] = {facet: {} for facet in FACETS}
+
+        for pid, p in changed.items():
+            old = previous.get(pid)
+            if old is not None and old.is_active:
+                for facet, values in facet_values(old).items():
+                    for value in values:
+                        removed[facet].setdefault(value, set()).add(pid)
+            if p.is_active:
+                for facet, values in facet_values(p).items():
+                    for value in values:
+                        added[facet].setdefault(value, set()).add(pid)
+
+        postings = {}
+        for facet in FACETS:
+            values = self.postings[facet].copy()
+            for value in removed[facet].keys() | added[facet].keys():
+                ids = (values.get(value, frozenset()) - removed[facet].get(value, set())) | added[facet].get(value, set())
+                if ids:
+                    values[value] = frozenset(ids)
+                else:
+                    values.pop(value, None)
+            postings[facet] = MappingProxyType(values)
+
+        active_ids = (self.active_ids - changed.keys()) | {pid for pid, p in changed.items() if p.is_active}
+        return FacetIndex(postings=MappingProxyType(postings), active_ids=frozenset(active_ids))
+
+    def counts(
+        self,
+        products: Mapping,
+        filters: Mapping[str, str],
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        restrict_to: Optional[FrozenSet[int]] = None,
+    ) -> Dict:
+        """Counts per facet value for the products matching the filters.
+
+        Each facet is counted with every filter except its own applied, so a
+        selected category still shows how many products the other categories hold.
+        """
+
+        def matching(skip: Optional[str] = None) -> FrozenSet[int]:
+            sets = [self.postings[f].get(v, frozenset()) for f, v in filters.items() if f != skip]
+            if restrict_to is not None:
+                sets.append(restrict_to)
+            if not sets:
+                ids = self.active_ids
+            else:
+                sets.sort(key=len)
+                ids = sets[0].intersection(*sets[1:]) if len(sets) > 1 else sets[0]
+            if (min_price or max_price) and skip != "price":
+                ids = frozenset(
+                    pid for pid in ids
+                    if (not min_price or products[pid].suggested_retail >= min_price)
+                    and (not max_price or products[pid].suggested_retail <= max_price)
+                )
+            return ids
+
+        facets = {}
+        for facet in FACETS:
+            if not filters and restrict_to is None and (not (min_price or max_price) or facet == "price"):
+                # No filters apply to this facet: the maintained counts are the answer
+                facets[facet] = {v: len(ids) for v, ids in self.postings[facet].items()}
+                continue
+            candidates = matching(skip=facet)
+            counts = {}
+            for value, ids in self.postings[facet].items():
+                n = len(ids & candidates)
+                if n:
+                    counts[value] = n
+            facets[facet] = counts
+
+        return {"total": len(matching()), "facets": facets}
+
+
+# What facet counting needs of a product; everything else stays in the database
+FACET_COLUMNS = (
+    Product.id, Product.is_active, Product.category, Product.subcategory,
+    Product.suggested_retail, Product.stock_quantity, Product.tags, Product.updated_at,
+)
+
+
+class FacetCache:
+    """Facet postings refreshed like the catalog snapshot: after writes in this
+    process and, for other workers' writes, incrementally once older than the TTL.
+    Like the snapshot, the next state is built off the event loop while requests
+    keep reading the current one."""
+
+    def __init__(self, ttl_seconds: float):
+        self.ttl_seconds = ttl_seconds
+        self._state: Optional[Tuple[FacetIndex, Mapping]] = None  # (index, id -> projected row)
+        self._high_water = None
+        self._built_at = 0.0
+        self._dirty = False
+        self._lock = asyncio.Lock()
+        self._refreshing: Optional[asyncio.Task] = None
+
+    def invalidate(self) -> None:
+        self._dirty = True
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._state is not None
+            and not self._dirty
+            and time.monotonic() - self._built_at < self.ttl_seconds
+        )
+
+    async def get(self) -> Tuple[FacetIndex, Mapping]:
+        """(index, rows) to pass to FacetIndex.counts"""
+        state = self._state
+        if state is None:
+            async with self._lock:
+                if self._state is None:
+                    await self._refresh()
+            return self._state
+        if not self._is_fresh() and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self._refresh_in_background())
+        return state
+
+    async def _refresh_in_background(self) -> None:
+        try:
+            async with self._lock:
+                await self._refresh()
+        except Exception as e:
+            self._dirty = True
+            print(f"⚠️  Facet index refresh failed: {e}")
+
+    async def _refresh(self) -> None:
+        self._dirty = False
+        query = select(*FACET_COLUMNS)
+        if self._state is not None and self._high_water is not None:
+            query = query.where(Product.updated_at >= self._high_water - REFRESH_OVERLAP)
+        async with async_session() as db:
+            rows = {row.id: row for row in (await db.execute(query)).all()}
+
+        self._state = await asyncio.to_thread(self._next_state, self._state, rows)
+        self._high_water = max(
+            filter(None, [self._high_water, *(row.updated_at for row in rows.values())]), default=None
+        )
+        self._built_at = time.monotonic()
+
+
+    @staticmethod
+    def _next_state(state: Optional[Tuple[FacetIndex, Mapping]], rows: Dict) -> Tuple[FacetIndex, Mapping]:
+        if state is None:
+            return FacetIndex.build(rows.values()), MappingProxyType(rows)
+        index, previous = state
+        changed = {pid: row for pid, row in rows.items() if previous.get(pid) != row}
+        if not changed:
+            return state
+        merged = previous.copy()  # C-level copy of the proxied dict
+        merged.update(changed)
+        return index.apply(previous, changed), MappingProxyType(merged)
+
+
+facet_cache = FacetCache(ttl_seconds=settings.CATALOG_CACHE_TTL_SECONDS)
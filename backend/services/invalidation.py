@@ -0,0 +1,49 @@
+"""
+Cache invalidation hooks for DropSkill AI
+Endpoints call these after committing writes so every derived cache stays in step
+"""
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.product import StoreProduct
+from services.catalog_cache import catalog_cache
+from services.facets import facet_cache
+from services.storefront_cache import storefront_cache
+
+
+async def on_products_changed(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Supplier products were created, updated or deactivated"""
+    on_catalog_changed()
+    await _invalidate_storefronts_carrying(db, product_ids)
+
+
+async def on_stock_changed(db: AsyncSession, sold_out: Iterable[int]) -> None:
+    """Checkout moved stock levels. Only storefronts showing a product that sold out
+    are dropped; the catalog and facets pick up stock numbers on their TTL refresh.
+    """
+    await _invalidate_storefronts_carrying(db, sold_out)
+
+
+async def _invalidate_storefronts_carrying(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    product_ids = list(product_ids)
+    if not product_ids:
+        return
+
+    # Storefronts carrying these products (ix_store_products_product)
+    result = await db.execute(
+        select(StoreProduct.store_id).where(StoreProduct.product_id.in_(product_ids)).distinct()
+    )
+    storefront_cache.invalidate_stores(result.scalars().all())
+
+
+def on_catalog_changed() -> None:
+    """Product rows changed in ways storefronts do not show"""
+    catalog_cache.invalidate()
+    facet_cache.invalidate()
+
+
+def on_store_changed(store_id: int) -> None:
+    """A store's settings or its product list changed"""
+    storefront_cache.invalidate_stores([store_id])
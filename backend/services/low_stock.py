@@ -0,0 +1,112 @@
+"""
+Low-Stock Alerts for DropSkill AI
+Write paths that touch stock compare stock levels before and after the write
+and publish threshold crossings to in-process subscribers (the admin SSE
+stream), so monitoring does not poll products. The current low-stock list is
+served by the partial index ix_products_low_stock.
+
+Subscribers only see writes made by the worker they are connected to.
+"""
+import asyncio
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Mapping, Set
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.product import Product
+
+LOW = "low"
+OK = "ok"
+
+
+@dataclass(frozen=True)
+class StockLevel:
+    product_id: int
+    sku: str
+    name: str
+    stock: int
+    threshold: int
+    is_active: bool
+
+    @property
+    def is_low(self) -> bool:
+        return bool(self.is_active) and (self.stock or 0) < (self.threshold or 0)
+
+    @classmethod
+    def of(cls, product) -> "StockLevel":
+        return cls(
+            product_id=product.id,
+            sku=product.sku,
+            name=product.name,
+            stock=product.stock_quantity,
+            threshold=product.low_stock_threshold,
+            is_active=product.is_active,
+        )
+
+
+async def stock_levels(db: AsyncSession, condition) -> Dict[int, StockLevel]:
+    """Stock levels of the products matching `condition`, in one query"""
+    result = await db.execute(
+        select(
+            Product.id, Product.sku, Product.name, Product.stock_quantity,
+            Product.low_stock_threshold, Product.is_active,
+        ).where(condition)
+    )
+    return {row.id: StockLevel(*row) for row in result.all()}
+
+
+def crossings(before: Mapping[int, StockLevel], after: Iterable[StockLevel]) -> List[Dict]:
+    """Alerts for products whose low-stock state differs from `before` (absent = not low)"""
+    now = datetime.utcnow().isoformat()
+    alerts = []
+    for level in after:
+        previous = before.get(level.product_id)
+        was_low = previous is not None and previous.is_low
+        if level.is_low != was_low:
+            alerts.append({
+                "product_id": level.product_id,
+                "sku": level.sku,
+                "name": level.name,
+                "stock": level.stock,
+                "threshold": level.threshold,
+                "state": LOW if level.is_low else OK,
+                "at": now,
+            })
+    return alerts
+
+
+class LowStockAlerts:
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, alerts: List[Dict]) -> None:
+        """Fan alerts out to every subscriber; a slow subscriber loses its oldest alerts"""
+        for alert in alerts:
+            self.published += 1
+            for queue in self._subscribers:
+                if queue.full():
+                    queue.get_nowait()
+                    self.dropped += 1
+                queue.put_nowait(alert)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        try:
+            yield queue
+        finally:
+            self._subscribers.discard(queue)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+
+low_stock_alerts = LowStockAlerts()
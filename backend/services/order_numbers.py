@@ -0,0 +1,211 @@
+"""
+Order Numbers for DropSkill AI
+Snowflake-style order numbers generated in process, no database round trip:
+41 bits of milliseconds since EPOCH, 10 bits of worker id, 12 bits of
+per-millisecond sequence. Rendered as fixed-width Crockford base32, so the
+string order is creation order.
+
+Numbers are unique as long as no two live processes share a worker id. Unless
+ORDER_WORKER_ID pins one, each process leases a free id from `worker_leases`
+at startup and renews the lease while it runs; a crashed process's id becomes
+reusable once its lease expires. A leased id is only used until a margin
+before the lease could have expired: if renewals stop succeeding, next()
+raises WorkerIdUnavailable until the lease is renewed or a new id is leased.
+"""
+import asyncio
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from config import settings
+from database import async_session
+from models.lease import WorkerLease
+
+EPOCH = datetime(2024, 1, 1)
+EPOCH_MS = int((EPOCH - datetime(1970, 1, 1)).total_seconds() * 1000)
+WORKER_BITS = 10
+SEQUENCE_BITS = 12
+MAX_WORKER = (1 << WORKER_BITS) - 1
+MAX_SEQUENCE = (1 << SEQUENCE_BITS) - 1
+
+PREFIX = "DS-"
+ALPHABET = "0123456789ABCDEFGHJKMNPQRSTVWXYZ"  # Crockford base32, ascending ASCII
+WIDTH = 13  # 63 bits
+LEASE_ATTEMPTS = 10
+LEASE_RETRY_SECONDS = 1  # between attempts to re-lease after losing the id
+
+
+def encode(value: int) -> str:
+    chars = []
+    for _ in range(WIDTH):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return PREFIX + "".join(reversed(chars))
+
+
+def decode(number: str) -> Tuple[datetime, int, int]:
+    """(created at, worker id, sequence) of an order number"""
+    value = 0
+    for char in number[len(PREFIX):]:
+        value = value * 32 + ALPHABET.index(char)
+    ms = value >> (WORKER_BITS + SEQUENCE_BITS)
+    worker = (value >> SEQUENCE_BITS) & MAX_WORKER
+    return EPOCH + timedelta(milliseconds=ms), worker, value & MAX_SEQUENCE
+
+
+class WorkerIdUnavailable(RuntimeError):
+    """No worker id this process may currently issue order numbers with"""
+
+
+class OrderNumberGenerator:
+    def __init__(self, worker_id: Optional[int] = None):
+        self.worker_id: Optional[int] = None
+        self.valid_until: Optional[float] = None  # time.monotonic() deadline; None when pinned
+        self._last_ms = -1
+        self._sequence = 0
+        self._lock = threading.Lock()
+        if worker_id is not None:
+            self.set_worker_id(worker_id)
+
+    def set_worker_id(self, worker_id: int, valid_until: Optional[float] = None) -> None:
+        if not 0 <= worker_id <= MAX_WORKER:
+            raise ValueError(f"worker id must be 0-{MAX_WORKER}")
+        with self._lock:
+            self.worker_id = worker_id
+            self.valid_until = valid_until
+
+    def extend(self, valid_until: float) -> None:
+        """Push back the deadline after a lease renewal"""
+        with self._lock:
+            self.valid_until = max(self.valid_until or 0, valid_until)
+
+    def clear_worker_id(self) -> None:
+        with self._lock:
+            self.worker_id = None
+            self.valid_until = None
+
+    def next(self) -> str:
+        with self._lock:
+            if self.worker_id is None:
+                raise WorkerIdUnavailable("No order worker id: set ORDER_WORKER_ID or lease one at startup")
+            if self.valid_until is not None and time.monotonic() >= self.valid_until:
+                raise WorkerIdUnavailable(f"Order worker id {self.worker_id} lease is not confirmed")
+            now = int(time.time() * 1000) - EPOCH_MS
+            # Never step back: a clock moved backwards keeps counting from the last millisecond
+            if now > self._last_ms:
+                self._last_ms, self._sequence = now, 0
+            elif self._sequence < MAX_SEQUENCE:
+                self._sequence += 1
+            else:
+                # 4096 numbers in one millisecond: borrow the next one
+                self._last_ms, self._sequence = self._last_ms + 1, 0
+            value = (self._last_ms << (WORKER_BITS + SEQUENCE_BITS)) | (self.worker_id << SEQUENCE_BITS) | self._sequence
+        return encode(value)
+
+
+class WorkerIdLease:
+    """Holds a `worker_leases` row for a generator while the process runs"""
+
+    def __init__(self, generator: OrderNumberGenerator, ttl_seconds: float):
+        self.generator = generator
+        self.ttl_seconds = ttl_seconds
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.worker_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _valid_until(self, started: float) -> float:
+        # A third of the TTL is kept as margin for clock skew between hosts
+        return started + self.ttl_seconds * 2 / 3
+
+    async def acquire(self) -> int:
+        """Lease the lowest worker id that is free or whose lease expired"""
+        for _ in range(LEASE_ATTEMPTS):
+            started = time.monotonic()
+            now = datetime.utcnow()
+            expires_at = now + timedelta(seconds=self.ttl_seconds)
+            async with async_session() as db:
+                result = await db.execute(select(WorkerLease.worker_id, WorkerLease.expires_at))
+                leases = dict(result.all())
+                worker_id = next(
+                    (i for i in range(MAX_WORKER + 1) if i not in leases or leases[i] < now), None
+                )
+                if worker_id is None:
+                    raise RuntimeError(f"All {MAX_WORKER + 1} order worker ids are leased by live processes")
+                try:
+                    if worker_id not in leases:
+                        db.add(WorkerLease(worker_id=worker_id, owner=self.owner, expires_at=expires_at))
+                    else:
+                        # Take over an expired lease only if nobody renewed or took it meanwhile
+                        result = await db.execute(
+                            update(WorkerLease)
+                            .where(WorkerLease.worker_id == worker_id, WorkerLease.expires_at == leases[worker_id])
+                            .values(owner=self.owner, expires_at=expires_at)
+                            .execution_options(synchronize_session=False)
+                        )
+                        if result.rowcount != 1:
+                            continue
+                    await db.commit()
+                except IntegrityError:
+                    # Another process inserted the same id first
+                    continue
+            self.worker_id = worker_id
+            self.generator.set_worker_id(worker_id, valid_until=self._valid_until(started))
+            return worker_id
+        raise RuntimeError("Could not lease an order worker id")
+
+    async def _renew(self) -> bool:
+        started = time.monotonic()
+        async with async_session() as db:
+            result = await db.execute(
+                update(WorkerLease)
+                .where(WorkerLease.worker_id == self.worker_id, WorkerLease.owner == self.owner)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.ttl_seconds))
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+        if result.rowcount != 1:
+            return False
+        self.generator.extend(self._valid_until(started))
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.ttl_seconds / 3 if self.worker_id is not None else LEASE_RETRY_SECONDS)
+            try:
+                if self.worker_id is not None and await self._renew():
+                    continue
+                if self.worker_id is not None:
+                    # Stalled past the TTL and the id may have been handed to another process
+                    print(f"⚠️  Order worker id {self.worker_id} lease lost, leasing a new one")
+                    self.worker_id = None
+                    self.generator.clear_worker_id()
+                await self.acquire()
+            except Exception as e:
+                # The generator stops issuing on its own once the deadline passes
+                print(f"⚠️  Order worker id lease renewal failed: {e}")
+
+    async def start(self) -> None:
+        await self.acquire()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.worker_id is not None:
+            async with async_session() as db:
+                await db.execute(
+                    delete(WorkerLease).where(WorkerLease.worker_id == self.worker_id, WorkerLease.owner == self.owner)
+                )
+                await db.commit()
+
+
+order_numbers = OrderNumberGenerator(settings.ORDER_WORKER_ID)
+worker_id_lease = WorkerIdLease(order_numbers, ttl_seconds=settings.ORDER_WORKER_LEASE_SECONDS)
@@ -0,0 +1,100 @@
+"""
+Keyset Pagination for DropSkill AI
+Opaque cursor tokens over (sort columns..., id) so page N costs the same as page 1
+"""
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import DateTime, tuple_
+from sqlalchemy.sql import Select
+
+CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(key: str, values: Sequence[Any]) -> str:
+    """Encode the sort key name and the last row's sort values into an opaque token"""
+    payload = {
+        "k": key,
+        "v": [v.isoformat() if isinstance(v, datetime) else v for v in values],
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, key: str, columns: Sequence) -> List[Any]:
+    """Decode a token produced by encode_cursor for the same sort key and columns"""
+    invalid = HTTPException(status_code=400, detail="Invalid cursor")
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+    except (ValueError, KeyError, TypeError):
+        raise invalid
+
+    # A cursor is only valid for the ordering that produced it
+    if payload.get("k") != key or not isinstance(values, list) or len(values) != len(columns):
+        raise invalid
+
+    try:
+        return [_cursor_value(v, col) for v, col in zip(values, columns)]
+    except (ValueError, TypeError):
+        raise invalid
+
+
+def _cursor_value(value: Any, column) -> Any:
+    """Check a decoded cursor value against its column's type; ValueError if it does not fit"""
+    if value is None:
+        # Only nullable keys can sort past a NULL
+        if getattr(getattr(column, "expression", column), "nullable", True):
+            return None
+        raise ValueError("NULL cursor value")
+    if isinstance(column.type, DateTime):
+        return datetime.fromisoformat(value)
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return value
+    if python_type is float and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    # bool is an int subclass: an id cursor of `true` is not valid
+    if not isinstance(value, python_type) or (python_type is int and isinstance(value, bool)):
+        raise ValueError(f"cursor value {value!r} is not {python_type.__name__}")
+    return value
+
+
+def keyset_paginate(
+    query: Select,
+    columns: Sequence,
+    *,
+    key: str,
+    descending: bool,
+    cursor: Optional[str],
+    limit: int,
+) -> Select:
+    """Order by columns (last one must be unique, e.g. id), seek past the cursor
+    and fetch one extra row so the caller can tell whether another page exists."""
+    if cursor:
+        values = decode_cursor(cursor, key, columns)
+        row = tuple_(*columns)
+        after = tuple_(*values)
+        query = query.where(row < after if descending else row > after)
+
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    return query.limit(limit + 1)
+
+
+def page_with_cursor(
+    rows: Sequence[Any],
+    limit: int,
+    key: str,
+    values_of: Callable[[Any], Sequence[Any]],
+) -> Tuple[List[Any], Optional[str]]:
+    """Trim the look-ahead row and build the cursor for the next page (None on the last page)"""
+    rows = list(rows)
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(key, values_of(rows[-1]))
@@ -0,0 +1,103 @@
+"""
+Password Hashing for DropSkill AI
+Runs bcrypt off the event loop on a bounded thread pool. bcrypt releases the
+GIL, so a few threads hash in parallel while other requests keep being served.
+Work beyond the pool plus the queue depth is rejected immediately rather than
+piling up behind slow hashes.
+"""
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Deque, Dict
+
+from fastapi import HTTPException
+
+from config import settings
+
+
+class LatencyStats:
+    """Count/mean/max plus percentiles over the most recent samples (ms)"""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: Deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.count += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+        self._recent.append(ms)
+
+    def summary(self) -> Dict[str, float]:
+        recent = sorted(self._recent)
+
+        def percentile(q: float) -> float:
+            return round(recent[min(len(recent) - 1, int(q * len(recent)))], 2) if recent else 0.0
+
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 2) if self.count else 0.0,
+            "p50_ms": percentile(0.50),
+            "p95_ms": percentile(0.95),
+            "max_ms": round(self.max, 2),
+        }
+
+
+class PasswordHasher:
+    def __init__(self, workers: int, queue_depth: int):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.in_flight = 0  # running + queued
+        self.rejected = 0
+        self.queue_wait = LatencyStats()
+        self.hash_latency = LatencyStats()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+
+    async def run(self, fn: Callable, *args):
+        """Run a hashing call on the pool, or fail fast with 503 when saturated"""
+        if self.in_flight >= self.workers + self.queue_depth:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self.queue_wait.record(started - submitted)
+            try:
+                return fn(*args)
+            finally:
+                self.hash_latency.record(time.perf_counter() - started)
+
+        self.in_flight += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, timed)
+        finally:
+            self.in_flight -= 1
+
+    def metrics(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self.in_flight,
+            "rejected": self.rejected,
+            "queue_wait": self.queue_wait.summary(),
+            "hash_latency": self.hash_latency.summary(),
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    queue_depth=settings.PASSWORD_HASH_QUEUE_DEPTH,
+)
@@ -0,0 +1,75 @@
+"""
+Principal Cache for DropSkill AI
+The authenticated user as a small immutable Principal, cached per user id with
+TTL + LRU eviction so get_current_user does not query `users` on every call.
+
+Role and activation changes made in this process call invalidate(); changes
+made by other workers are picked up when entries expire
+(PRINCIPAL_CACHE_TTL_SECONDS).
+"""
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from config import settings
+
+
+@dataclass(frozen=True)
+class Principal:
+    id: int
+    email: str
+    full_name: Optional[str]
+    role: str
+    is_active: bool
+    created_at: Optional[datetime] = None
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            created_at=user.created_at,
+        )
+
+
+class PrincipalCache:
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Tuple[float, Principal]]" = OrderedDict()
+
+    def get(self, user_id: int) -> Optional[Principal]:
+        entry = self._entries.get(user_id)
+        if entry is not None and time.monotonic() - entry[0] >= self.ttl_seconds:
+            del self._entries[user_id]
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, principal: Principal) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[principal.id] = (time.monotonic(), principal)
+        self._entries.move_to_end(principal.id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int) -> None:
+        self._entries.pop(user_id, None)
+
+
+principal_cache = PrincipalCache(
+    max_entries=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
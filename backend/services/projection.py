@@ -0,0 +1,71 @@
+"""
+Projection responses for DropSkill AI
+List endpoints can ask for a subset of product columns (`fields=`). Those are
+selected with Core and the row tuples are serialized directly, skipping ORM
+hydration, JSON column decoding and Pydantic validation.
+"""
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Mapping, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Response
+
+from models.product import Product
+
+SUMMARY = "summary"
+
+PRODUCT_SUMMARY_FIELDS = (
+    "id", "sku", "name", "category", "subcategory", "base_price", "suggested_retail",
+    "stock_quantity", "image_url", "demand_score", "margin_potential", "is_active", "created_at",
+)
+
+# Everything ProductResponse exposes may be requested explicitly
+PRODUCT_FIELDS = PRODUCT_SUMMARY_FIELDS + (
+    "description", "cost_price", "images", "specifications", "tags",
+)
+
+
+def parse_fields(fields: Optional[str], required: Sequence[str] = ("id",)) -> Optional[Tuple[str, ...]]:
+    """`summary` or a comma separated list of product columns; None means the full response.
+
+    `required` columns (id, and the sort key for cursors) are always included.
+    """
+    if not fields:
+        return None
+    if fields == SUMMARY:
+        names = list(PRODUCT_SUMMARY_FIELDS)
+    else:
+        names = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in names if name not in PRODUCT_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    for name in reversed(required):
+        if name not in names:
+            names.insert(0, name)
+    return tuple(dict.fromkeys(names))
+
+
+def product_columns(names: Iterable[str]) -> list:
+    return [getattr(Product, name) for name in names]
+
+
+def project(item: Any, names: Sequence[str]) -> dict:
+    """Pick fields off a Row, ORM object or cached response model"""
+    return {name: getattr(item, name) for name in names}
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def to_json(content: Any) -> str:
+    """Compact JSON for plain dicts/lists/rows (datetimes as ISO 8601)"""
+    return json.dumps(content, default=_default, separators=(",", ":"))
+
+
+def json_response(content: Any, headers: Optional[Mapping[str, str]] = None) -> Response:
+    """Serialize plain dicts/lists straight to a JSON response"""
+    body = to_json(content)
+    return Response(content=body, media_type="application/json", headers=dict(headers or {}))
@@ -0,0 +1,41 @@
+"""
+Schema Check for DropSkill AI
+Reports indexes and unique constraints declared on the models but missing from the database
+"""
+from typing import List
+
+from sqlalchemy import inspect, UniqueConstraint
+
+from database import Base
+
+
+def _missing_in(sync_conn) -> List[str]:
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+    missing = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            missing.append(f"table {table.name}")
+            continue
+
+        index_names = {ix["name"] for ix in inspector.get_indexes(table.name)}
+        unique_names = {uc["name"] for uc in inspector.get_unique_constraints(table.name)}
+
+        for index in table.indexes:
+            if index.name not in index_names:
+                missing.append(f"index {table.name}.{index.name}")
+
+        for constraint in table.constraints:
+            if not isinstance(constraint, UniqueConstraint) or not constraint.name:
+                continue
+            # Some backends report unique constraints as unique indexes
+            if constraint.name not in unique_names and constraint.name not in index_names:
+                missing.append(f"unique constraint {table.name}.{constraint.name}")
+
+    return missing
+
+
+async def find_missing_schema_objects(conn) -> List[str]:
+    """Compare the deployed database against the model metadata"""
+    return await conn.run_sync(_missing_in)
@@ -0,0 +1,119 @@
+"""
+Catalog Search for DropSkill AI
+Full-text search over the supplier catalog: SQLite FTS5 or a Postgres tsvector/GIN index
+"""
+import re
+from typing import Optional, Tuple
+
+from sqlalchemy import text, literal_column, func, column, table, false
+from sqlalchemy.sql import Select, ColumnElement
+
+from database import engine
+from models.product import Product
+
+# Document indexed on Postgres. The query must use this exact expression so the
+# planner can match it against the GIN expression index.
+PG_DOCUMENT = (
+    "to_tsvector('english'::regconfig, "
+    "coalesce(name, '') || ' ' || coalesce(description, '') || ' ' || "
+    "coalesce(category, '') || ' ' || coalesce(tags::text, ''))"
+)
+
+SQLITE_DDL = [
+    # External-content table: rows live in products, FTS5 only stores the index
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+        name, description, category, tags,
+        content='products', content_rowid='id',
+        tokenize='porter unicode61'
+    )
+    """,
+    # Triggers keep the index in sync with every write path (admin endpoints, seeding, bulk SQL)
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO products_fts(rowid, name, description, category, tags)
+        VALUES (new.id, new.name, new.description, new.category, new.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, tags)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name, description, category, tags ON products BEGIN
+        INSERT INTO products_fts(products_fts, rowid, name, description, category, tags)
+        VALUES ('delete', old.id, old.name, old.description, old.category, old.tags);
+        INSERT INTO products_fts(rowid, name, description, category, tags)
+        VALUES (new.id, new.name, new.description, new.category, new.tags);
+    END
+    """,
+]
+
+POSTGRES_DDL = [
+    f"CREATE INDEX IF NOT EXISTS ix_products_search ON products USING GIN ({PG_DOCUMENT})",
+]
+
+products_fts = table("products_fts", column("rowid"), column("rank"))
+
+
+class CatalogSearch:
+    def __init__(self, dialect: str):
+        self.dialect = dialect
+
+    async def setup(self, conn) -> None:
+        """Create the search index and sync triggers (idempotent)"""
+        if self.dialect == "sqlite":
+            result = await conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'products_fts'")
+            )
+            exists = result.scalar() is not None
+            for statement in SQLITE_DDL:
+                await conn.execute(text(statement))
+            if not exists:
+                # Index rows that were written before the search table existed
+                await conn.execute(text("INSERT INTO products_fts(products_fts) VALUES ('rebuild')"))
+        elif self.dialect == "postgresql":
+            for statement in POSTGRES_DDL:
+                await conn.execute(text(statement))
+
+    @staticmethod
+    def _fts5_query(term: str) -> Optional[str]:
+        """Turn free text into a safe FTS5 query: every word must match, as a prefix"""
+        tokens = re.findall(r"\w+", term.lower())
+        if not tokens:
+            return None
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def apply(self, query: Select, term: str) -> Tuple[Select, Optional[ColumnElement]]:
+        """Restrict a Product query to search matches.
+
+        Returns the filtered query and an expression to order by for relevance
+        (best match first), or None when there is nothing to rank.
+        """
+        if self.dialect == "sqlite":
+            match = self._fts5_query(term)
+            if match is None:
+                # Nothing searchable (punctuation only) matches nothing
+                return query.where(false()), None
+            query = (
+                query.join(products_fts, products_fts.c.rowid == Product.id)
+                .where(literal_column("products_fts").op("MATCH")(match))
+            )
+            # FTS5 rank is bm25(): lower is better
+            return query, products_fts.c.rank.asc()
+
+        if self.dialect == "postgresql":
+            document = literal_column(PG_DOCUMENT)
+            ts_query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), term)
+            query = query.where(document.op("@@")(ts_query))
+            return query, func.ts_rank(document, ts_query).desc()
+
+        # Other backends: fall back to substring matching without ranking
+        pattern = f"%{term}%"
+        query = query.where(Product.name.ilike(pattern) | Product.description.ilike(pattern))
+        return query, None
+
+
+catalog_search = CatalogSearch(engine.dialect.name)
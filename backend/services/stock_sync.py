@@ -0,0 +1,65 @@
+"""
+Stock & Price Sync for DropSkill AI
+Applies supplier feed deltas (stock and prices by SKU) in one transaction:
+current values are read with one IN query per chunk, unchanged rows are
+skipped, and the rest is written as primary-key executemany UPDATEs.
+"""
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.product import Product
+from schemas import ProductSyncItem
+from services.storefront_items import sync_products
+from services.low_stock import stock_levels, crossings
+
+SYNC_FIELDS = ("stock_quantity", "cost_price", "base_price", "suggested_retail")
+LOOKUP_CHUNK = 1000
+
+
+async def apply_deltas(
+    db: AsyncSession, items: List[ProductSyncItem]
+) -> Tuple[List[int], int, List[str], List[Dict]]:
+    """Update changed rows (not committed).
+    
+    Returns (changed ids, unchanged count, missing SKUs, low-stock crossings to
+    publish once committed).
+    """
+    deltas: Dict[str, Dict] = {}
+    for item in items:  # a later delta for the same SKU wins
+        deltas.setdefault(item.sku, {}).update(item.model_dump(include=set(SYNC_FIELDS), exclude_none=True))
+
+    skus = list(deltas)
+    current = {}
+    for i in range(0, len(skus), LOOKUP_CHUNK):
+        result = await db.execute(
+            select(Product.id, Product.sku, *(getattr(Product, f) for f in SYNC_FIELDS))
+            .where(Product.sku.in_(skus[i:i + LOOKUP_CHUNK]))
+            .with_for_update()  # rows stay as read until commit (no-op on SQLite)
+        )
+        current.update({row.sku: row for row in result.all()})
+
+    now = datetime.utcnow()
+    updates = []
+    for sku, delta in deltas.items():
+        row = current.get(sku)
+        if row is None:
+            continue
+        changed = {field: value for field, value in delta.items() if getattr(row, field) != value}
+        if changed:
+            updates.append({"id": row.id, **changed, "updated_at": now})
+
+    changed_ids = [u["id"] for u in updates]
+    alerts = []
+    if updates:
+        before = await stock_levels(db, Product.id.in_(changed_ids))
+        # ORM bulk UPDATE by primary key: one executemany per distinct set of changed columns
+        await db.execute(update(Product), updates)
+        await sync_products(db, changed_ids)
+        after = await stock_levels(db, Product.id.in_(changed_ids))
+        alerts = crossings(before, after.values())
+
+    missing = [sku for sku in skus if sku not in current]
+    return changed_ids, len(current) - len(updates), missing, alerts
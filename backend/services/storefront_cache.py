@@ -0,0 +1,149 @@
+"""
+Storefront Cache for DropSkill AI
+Fully serialized public storefront responses (plain and gzip bytes) keyed by
+slug - the storefront header - or by slug plus query for product listing pages,
+bounded by a memory cap with LRU eviction.
+
+All entries of a store are dropped precisely when the store, one of its store
+products or a product it carries changes in this process (a product change
+can move other rows onto a listing page, so invalidation is per store). Writes
+made by other workers are picked up when entries expire
+(STOREFRONT_CACHE_TTL_SECONDS).
+
+Active store ids are also cached by slug (LRU, same TTL and invalidation) for
+hot endpoints that only need the id, such as storefront event ingestion.
+"""
+import gzip
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, Optional, Set, Tuple
+
+from config import settings
+
+
+@dataclass(frozen=True)
+class CachedStorefront:
+    key: str
+    store_id: int
+    etag: str
+    body: bytes
+    gzip_body: bytes
+    headers: Tuple[Tuple[str, str], ...] = ()
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzip_body)
+
+
+class StorefrontCache:
+    def __init__(self, max_bytes: int, ttl_seconds: float, max_slugs: int):
+        self.max_bytes = max_bytes
+        self.max_slugs = max_slugs
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0  # bumped by every invalidation
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, CachedStorefront]" = OrderedDict()
+        self._by_store: Dict[int, Set[str]] = {}
+        self._store_ids: "OrderedDict[str, Tuple[float, int]]" = OrderedDict()  # slug -> (cached at, id)
+        self._slugs: Dict[int, str] = {}
+
+    @staticmethod
+    def build(
+        key: str,
+        store_id: int,
+        etag: str,
+        body: bytes,
+        headers: Optional[Dict[str, str]] = None,
+    ) -> CachedStorefront:
+        return CachedStorefront(
+            key=key,
+            store_id=store_id,
+            etag=etag,
+            body=body,
+            gzip_body=gzip.compress(body, compresslevel=6),
+            headers=tuple((headers or {}).items()),
+        )
+
+    def get(self, key: str) -> Optional[CachedStorefront]:
+        entry = self._entries.get(key)
+        if entry is not None and time.monotonic() - entry.created_at >= self.ttl_seconds:
+            self._remove(key)
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, entry: CachedStorefront, generation: int) -> None:
+        """Store an entry built from data read when `generation` was current.
+
+        If anything was invalidated meanwhile the entry may already be stale, so
+        it is dropped; the next request rebuilds it.
+        """
+        if generation != self.generation or entry.size > self.max_bytes:
+            return
+        self._remove(entry.key)
+        self._entries[entry.key] = entry
+        self._by_store.setdefault(entry.store_id, set()).add(entry.key)
+        self.size += entry.size
+
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+
+    def store_id(self, slug: str) -> Optional[int]:
+        """Cached id of the active store with this slug"""
+        entry = self._store_ids.get(slug)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] >= self.ttl_seconds:
+            self._forget_slug(slug)
+            return None
+        self._store_ids.move_to_end(slug)
+        return entry[1]
+
+    def put_store_id(self, slug: str, store_id: int, generation: int) -> None:
+        """Cache a slug looked up when `generation` was current (see put)"""
+        if generation != self.generation or self.max_slugs <= 0:
+            return
+        self._forget_slug(self._slugs.get(store_id))
+        self._store_ids[slug] = (time.monotonic(), store_id)
+        self._slugs[store_id] = slug
+        while len(self._store_ids) > self.max_slugs:
+            self._forget_slug(next(iter(self._store_ids)))
+
+    def invalidate_stores(self, store_ids: Iterable[int]) -> None:
+        self.generation += 1
+        for store_id in store_ids:
+            for key in list(self._by_store.get(store_id, ())):
+                self._remove(key)
+            self._forget_slug(self._slugs.get(store_id))
+
+    def _forget_slug(self, slug: Optional[str]) -> None:
+        entry = self._store_ids.pop(slug, None) if slug is not None else None
+        if entry is not None:
+            self._slugs.pop(entry[1], None)
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        self.size -= entry.size
+        keys = self._by_store.get(entry.store_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_store[entry.store_id]
+
+
+storefront_cache = StorefrontCache(
+    max_bytes=settings.STOREFRONT_CACHE_MAX_BYTES,
+    ttl_seconds=settings.STOREFRONT_CACHE_TTL_SECONDS,
+    max_slugs=settings.STOREFRONT_SLUG_CACHE_MAX_ENTRIES,
+)
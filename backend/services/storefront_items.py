@@ -0,0 +1,90 @@
+"""
+Storefront read model for DropSkill AI
+Keeps storefront_items in step with store_products and products using set-based
+DELETE + INSERT ... SELECT statements. Callers run these before committing, so
+the read model changes in the same transaction as the write it reflects.
+"""
+from datetime import datetime
+from typing import Iterable
+
+from sqlalchemy import select, delete, func, case, literal, DateTime, exists
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from models.product import Product, StoreProduct
+from models.storefront import StorefrontItem
+
+ITEM_COLUMNS = (
+    "id", "store_id", "product_id", "name", "description", "price", "image_url",
+    "images", "category", "is_featured", "in_stock", "created_at", "updated_at",
+)
+
+
+def _resolved_rows():
+    """store_products x products with the storefront fallbacks resolved in SQL.
+
+    Mirrors `custom_x or product.x`: empty names/descriptions and a zero price
+    fall back to the supplier values.
+    """
+    return (
+        select(
+            StoreProduct.id,
+            StoreProduct.store_id,
+            StoreProduct.product_id,
+            func.coalesce(func.nullif(StoreProduct.custom_name, ""), Product.name),
+            func.coalesce(func.nullif(StoreProduct.custom_description, ""), Product.description),
+            func.coalesce(func.nullif(StoreProduct.custom_price, 0), Product.suggested_retail),
+            Product.image_url,
+            Product.images,
+            Product.category,
+            StoreProduct.is_featured,
+            case((Product.stock_quantity > 0, True), else_=False),
+            StoreProduct.created_at,
+            literal(datetime.utcnow(), DateTime),
+        )
+        .join(Product, Product.id == StoreProduct.product_id)
+        .where(StoreProduct.is_active == True, Product.is_active == True)
+    )
+
+
+async def _replace(db: AsyncSession, condition_items, condition_source) -> None:
+    await db.execute(delete(StorefrontItem).where(condition_items))
+    await db.execute(
+        StorefrontItem.__table__.insert().from_select(
+            ITEM_COLUMNS, _resolved_rows().where(condition_source)
+        )
+    )
+
+
+async def sync_store_products(db: AsyncSession, store_product_ids: Iterable[int]) -> None:
+    """Recompute rows for specific store products (imported, edited or removed)"""
+    ids = list(store_product_ids)
+    if ids:
+        await _replace(db, StorefrontItem.id.in_(ids), StoreProduct.id.in_(ids))
+
+
+async def sync_products(db: AsyncSession, product_ids: Iterable[int]) -> None:
+    """Recompute rows of every store product that references these supplier products"""
+    ids = list(product_ids)
+    if ids:
+        await _replace(db, StorefrontItem.product_id.in_(ids), StoreProduct.product_id.in_(ids))
+
+
+async def remove_store_products(db: AsyncSession, store_product_ids: Iterable[int]) -> None:
+    """Drop rows ahead of deleting their store products"""
+    ids = list(store_product_ids)
+    if ids:
+        await db.execute(delete(StorefrontItem).where(StorefrontItem.id.in_(ids)))
+
+
+async def remove_store(db: AsyncSession, store_id: int) -> None:
+    await db.execute(delete(StorefrontItem).where(StorefrontItem.store_id == store_id))
+
+
+async def backfill(db: AsyncSession) -> bool:
+    """Build the read model for databases that predate it. Returns True if it ran."""
+    has_items = await db.execute(select(exists().where(StorefrontItem.id.isnot(None))))
+    has_sources = await db.execute(select(exists().where(StoreProduct.id.isnot(None))))
+    if has_items.scalar() or not has_sources.scalar():
+        return False
+    await db.execute(StorefrontItem.__table__.insert().from_select(ITEM_COLUMNS, _resolved_rows()))
+    return True
@@ -0,0 +1,62 @@
+import sys
+import os
+import asyncio
+import json
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Throwaway database unless IMPORT_TEST_DATABASE_URL points at e.g. Postgres
+db_file = os.path.join(tempfile.mkdtemp(), "import.db")
+os.environ["DATABASE_URL"] = os.getenv("IMPORT_TEST_DATABASE_URL", f"sqlite+aiosqlite:///{db_file}")
+os.environ["DEBUG"] = "false"
+
+import httpx
+
+from main import app, lifespan
+
+print("Testing that re-importing a partial row keeps the columns it did not send...")
+
+async def main():
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            token = (await client.post(
+                "/api/auth/login", json={"email": "admin@dropskill.ai", "password": "admin123"}
+            )).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            product = (await client.post("/api/admin/products", headers=headers, json={
+                "sku": "X1", "name": "Original", "description": "Keep me", "category": "Test",
+                "cost_price": 1, "base_price": 2, "suggested_retail": 5, "stock_quantity": 77,
+                "tags": ["keep"]
+            })).json()
+
+            feed = "\n".join(json.dumps(row) for row in [
+                {"sku": "X1", "name": "Renamed", "category": "Test",
+                 "cost_price": 1, "base_price": 2, "suggested_retail": 6},
+                {"sku": "X2", "name": "New", "category": "Test",
+                 "cost_price": 1, "base_price": 2, "suggested_retail": 3, "stock_quantity": 5},
+            ])
+            report = (await client.post(
+                "/api/admin/products/import", headers=headers, content=feed.encode()
+            )).json()
+            print(f"Report: inserted {report['inserted']}, updated {report['updated']}, failed {report['failed']}")
+
+            updated = (await client.get(f"/api/products/{product['id']}", headers=headers)).json()
+            print(f"X1 after re-import: {updated}")
+
+    assert report["inserted"] == 1 and report["updated"] == 1 and report["failed"] == 0
+    assert updated["name"] == "Renamed" and updated["suggested_retail"] == 6, "sent columns should update"
+    assert updated["stock_quantity"] == 77, "stock was overwritten by a default"
+    assert updated["description"] == "Keep me", "description was overwritten by a default"
+    assert updated["tags"] == ["keep"], "tags were overwritten by a default"
+    print("Unsent columns survived the re-import")
+
+try:
+    asyncio.run(main())
+except Exception as e:
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
@@ -0,0 +1,82 @@
+import sys
+import os
+import asyncio
+import tempfile
+
+# Add current directory to path
+sys.path.append(os.getcwd())
+
+# Throwaway database unless CHECKOUT_TEST_DATABASE_URL points at e.g. Postgres
+db_file = os.path.join(tempfile.mkdtemp(), "checkout.db")
+os.environ["DATABASE_URL"] = os.getenv("CHECKOUT_TEST_DATABASE_URL", f"sqlite+aiosqlite:///{db_file}")
+os.environ["DEBUG"] = "false"
+
+import httpx
+from sqlalchemy import select, func
+
+from main import app, lifespan
+from database import async_session
+from models.product import Product
+from models.order import Order, OrderItem
+from services.counters import read_counters, recount
+
+CHECKOUTS = int(os.getenv("CHECKOUTS", "300"))
+STOCK = 50
+
+print(f"Testing {CHECKOUTS} concurrent checkouts of one SKU with stock {STOCK}...")
+
+async def main():
+    async with lifespan(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+            token = (await client.post(
+                "/api/auth/login", json={"email": "admin@dropskill.ai", "password": "admin123"}
+            )).json()["access_token"]
+            headers = {"Authorization": f"Bearer {token}"}
+
+            product = (await client.post("/api/admin/products", headers=headers, json={
+                "sku": "FLASH-SALE-1", "name": "Flash Sale Item", "category": "Test",
+                "cost_price": 1, "base_price": 2, "suggested_retail": 5, "stock_quantity": STOCK
+            })).json()
+            store = (await client.post("/api/stores", headers=headers, json={"name": "Flash Store"})).json()
+            store_product = (await client.post(
+                f"/api/stores/{store['id']}/products", headers=headers, json={"product_id": product["id"]}
+            )).json()
+
+            async def checkout(i):
+                response = await client.post(f"/api/stores/public/{store['slug']}/orders", json={
+                    "customer_name": f"Customer {i}",
+                    "customer_email": f"customer{i}@example.com",
+                    "items": [{"store_product_id": store_product["id"], "quantity": 1}]
+                })
+                return response.status_code
+
+            statuses = await asyncio.gather(*(checkout(i) for i in range(CHECKOUTS)))
+
+    async with async_session() as db:
+        stock = (await db.execute(
+            select(Product.stock_quantity).where(Product.id == product["id"])
+        )).scalar()
+        orders = (await db.execute(select(func.count(Order.id)))).scalar()
+        sold = (await db.execute(
+            select(func.coalesce(func.sum(OrderItem.quantity), 0)).where(OrderItem.product_id == product["id"])
+        )).scalar()
+        counters, totals = await read_counters(db), await recount(db)
+
+    created = statuses.count(201)
+    rejected = statuses.count(409)
+    print(f"Created: {created}, rejected (out of stock): {rejected}, other: {len(statuses) - created - rejected}")
+    print(f"Final stock: {stock}, orders: {orders}, units sold: {sold}")
+
+    assert created == STOCK, "every unit should sell exactly once"
+    assert rejected == CHECKOUTS - STOCK
+    assert stock == 0 and sold == STOCK and orders == STOCK, "oversold or lost stock update"
+    assert counters["orders"] == totals["orders"] and counters["revenue"] == totals["revenue"], "counters drifted"
+    print("No oversells, counters match")
+
+try:
+    asyncio.run(main())
+except Exception as e:
+    import traceback
+    traceback.print_exc()
+    sys.exit(1)
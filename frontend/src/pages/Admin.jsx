@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useAuth } from '../App'
+import { fetchAllPages } from '../pagination'
 import {
     Sparkles, Package, Users, Store, ShoppingBag, TrendingUp,
     Plus, AlertTriangle, BarChart3, Settings
@@ -25,12 +26,12 @@ export default function Admin() {
 
     const fetchData = async () => {
         try {
-            const [analyticsRes, productsRes] = await Promise.all([
+            const [analyticsRes, allProducts] = await Promise.all([
                 fetch('/api/admin/analytics', { headers: { Authorization: `Bearer ${token}` } }),
-                fetch('/api/admin/products', { headers: { Authorization: `Bearer ${token}` } })
+                fetchAllPages('/api/admin/products', { headers: { Authorization: `Bearer ${token}` } })
             ])
             if (analyticsRes.ok) setAnalytics(await analyticsRes.json())
-            if (productsRes.ok) setProducts(await productsRes.json())
+            setProducts(allProducts)
         } catch (err) {
             console.error(err)
         } finally {
@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link } from 'react-router-dom'
 import { useAuth } from '../App'
+import { fetchAllPages } from '../pagination'
 import {
     Sparkles, Package, Search, Filter, Plus, Check, ArrowLeft,
     TrendingUp, BarChart3, Settings
@@ -46,13 +47,11 @@ export default function Catalog() {
 
     const fetchStoreProducts = async (storeId) => {
         try {
-            const res = await fetch(`/api/stores/${storeId}/products`, {
+            // Every page: a product missing from this set would be offered for import again
+            const data = await fetchAllPages(`/api/stores/${storeId}/products`, {
                 headers: { Authorization: `Bearer ${token}` }
             })
-            if (res.ok) {
-                const data = await res.json()
-                setStoreProducts(new Set(data.map(sp => sp.product_id)))
-            }
+            setStoreProducts(new Set(data.map(sp => sp.product_id)))
         } catch (err) {
             console.error(err)
         }
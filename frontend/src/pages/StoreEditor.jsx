@@ -1,6 +1,7 @@
 import { useState, useEffect } from 'react'
 import { Link, useParams } from 'react-router-dom'
 import { useAuth } from '../App'
+import { fetchAllPages } from '../pagination'
 import {
     Sparkles, ArrowLeft, Trash2, Star, ExternalLink, Palette,
     Package, Bot, Send, X, MessageSquare
@@ -35,10 +36,9 @@ export default function StoreEditor() {
 
     const fetchProducts = async () => {
         try {
-            const res = await fetch(`/api/stores/${storeId}/products`, {
+            setProducts(await fetchAllPages(`/api/stores/${storeId}/products`, {
                 headers: { Authorization: `Bearer ${token}` }
-            })
-            if (res.ok) setProducts(await res.json())
+            }))
         } catch (err) {
             console.error(err)
         } finally {
@@ -5,6 +5,8 @@ import { ShoppingCart, Star, Package, ChevronRight, X } from 'lucide-react'
 export default function Storefront() {
     const { slug } = useParams()
     const [store, setStore] = useState(null)
+    const [products, setProducts] = useState([])
+    const [nextCursor, setNextCursor] = useState(null)
     const [loading, setLoading] = useState(true)
     const [selectedProduct, setSelectedProduct] = useState(null)
     const [cart, setCart] = useState([])
@@ -15,8 +17,11 @@ export default function Storefront() {
 
     const fetchStore = async () => {
         try {
-            const res = await fetch(`/api/stores/public/${slug}`)
-            if (res.ok) setStore(await res.json())
+            const [storeRes] = await Promise.all([
+                fetch(`/api/stores/public/${slug}`),
+                fetchProducts(null)
+            ])
+            if (storeRes.ok) setStore(await storeRes.json())
         } catch (err) {
             console.error(err)
         } finally {
@@ -24,6 +29,18 @@ export default function Storefront() {
         }
     }
 
+    // The header only carries the first few featured products, so the paged
+    // listing holds every product (featured first)
+    const fetchProducts = async (cursor) => {
+        const params = new URLSearchParams()
+        if (cursor) params.set('cursor', cursor)
+        const res = await fetch(`/api/stores/public/${slug}/products?${params}`)
+        if (!res.ok) return
+        const page = await res.json()
+        setProducts(prev => cursor ? [...prev, ...page] : page)
+        setNextCursor(res.headers.get('X-Next-Cursor'))
+    }
+
     const addToCart = (product) => {
         setCart([...cart, product])
         setSelectedProduct(null)
@@ -44,8 +61,7 @@ export default function Storefront() {
         )
     }
 
-    const featured = store.products.filter(p => p.is_featured)
-    const regular = store.products.filter(p => !p.is_featured)
+    const featured = store.featured
 
     // Template styles
     const templates = {
@@ -127,14 +143,14 @@ export default function Storefront() {
                 {/* All Products */}
                 <section>
                     <h2 className="text-2xl font-bold text-gray-900 mb-6">All Products</h2>
-                    {store.products.length === 0 ? (
+                    {products.length === 0 ? (
                         <div className="text-center py-12 bg-white rounded-2xl">
                             <Package className="w-12 h-12 text-gray-300 mx-auto mb-4" />
                             <p className="text-gray-500">No products available yet</p>
                         </div>
                     ) : (
                         <div className="grid md:grid-cols-3 lg:grid-cols-4 gap-6">
-                            {(featured.length > 0 ? regular : store.products).map(product => (
+                            {products.map(product => (
                                 <div key={product.id} className={`${style.card} bg-white overflow-hidden cursor-pointer transition-all`} onClick={() => setSelectedProduct(product)}>
                                     <div className="aspect-square bg-gray-100">
                                         {product.image_url ? <img src={product.image_url} alt="" className="w-full h-full object-cover" /> : <Package className="w-12 h-12 text-gray-300 m-auto" />}
@@ -151,6 +167,13 @@ export default function Storefront() {
                             ))}
                         </div>
                     )}
+                    {nextCursor && (
+                        <div className="text-center mt-8">
+                            <button onClick={() => fetchProducts(nextCursor)} className={`${style.button} text-white px-6 py-3 rounded-xl font-semibold`}>
+                                Load more
+                            </button>
+                        </div>
+                    )}
                 </section>
             </main>
 
@@ -0,0 +1,14 @@
+// List endpoints are keyset-paginated: follow X-Next-Cursor until the last page
+export async function fetchAllPages(url, options = {}, limit = 500) {
+    const rows = []
+    let cursor = null
+    do {
+        const params = new URLSearchParams({ limit })
+        if (cursor) params.set('cursor', cursor)
+        const res = await fetch(`${url}?${params}`, options)
+        if (!res.ok) throw new Error(`${url} returned ${res.status}`)
+        rows.push(...await res.json())
+        cursor = res.headers.get('X-Next-Cursor')
+    } while (cursor)
+    return rows
+}